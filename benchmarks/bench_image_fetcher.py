@@ -0,0 +1,80 @@
+"""
+Micro-benchmark of the per-call overhead of ImageFetcher against a local stub server.
+
+Compares constructing a new client for every lookup (the previous behaviour)
+with reusing one fetcher and its pooled keep-alive connections.
+
+Usage:
+    python -m benchmarks.bench_image_fetcher [--calls 500]
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.image_fetcher import ImageFetcher
+
+STUB_RESPONSE = json.dumps({"items": [{"link": "https://example.com/pizza.jpg"}]}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers every request like the Custom Search API with a single image."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, avoid delayed ACK stalls on kept-alive connections
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(STUB_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(STUB_RESPONSE)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def bench_new_client_per_call(base_url: str, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fetcher = ImageFetcher("key", "cse", base_url=base_url)
+        fetcher.fetch_image_url("pizza")
+        fetcher.close()
+    return time.perf_counter() - start
+
+
+def bench_shared_client(base_url: str, calls: int) -> float:
+    fetcher = ImageFetcher("key", "cse", base_url=base_url)
+    start = time.perf_counter()
+    for _ in range(calls):
+        fetcher.fetch_image_url("pizza")
+    elapsed = time.perf_counter() - start
+    fetcher.close()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/customsearch/v1"
+
+    # Warm up imports and the server
+    bench_shared_client(base_url, 10)
+
+    for name, bench in (("new client per call", bench_new_client_per_call),
+                        ("shared pooled client", bench_shared_client)):
+        elapsed = bench(base_url, args.calls)
+        print(f"{name:<22} {elapsed / args.calls * 1000:8.3f} ms/call  ({args.calls} calls)")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Benchmark of the menu page rendering for 10, 100 and 1000 menu items.
+
+Usage:
+    python -m benchmarks.bench_menu_render [--repeat 50]
+"""
+
+import argparse
+import time
+
+from src.menu_renderer import render_menu
+
+
+def make_items(count: int) -> list:
+    return [{
+        "name": f"Dish {i} & <special>",
+        "description": "Fresh tomatoes, mozzarella \"di bufala\" and basil",
+        "price": f"${i % 30 + 5}.99",
+        "image_url": f"https://example.com/images/{i}.jpg" if i % 4 else None,
+    } for i in range(count)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    for count in (10, 100, 1000):
+        items = make_items(count)
+        render_menu(items)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            html = render_menu(items)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print(f"{count:>5} items  {elapsed * 1000:8.3f} ms/page  {elapsed / count * 1e6:6.2f} us/item  {len(html):>8} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Benchmark of OCR wall time and character accuracy with and without preprocessing,
+of the tesseract command against a persistent Tesseract engine (tesserocr), and of
+splitting pages into bands that are read in parallel by the OCR worker pool.
+
+Reads every image in the fixture directory that has a ground truth text file of the
+same name next to it (menu.jpg + menu.txt). Without a fixture directory, a small and
+a large synthetic menu photo are generated. Requires the tesseract binary.
+
+Usage:
+    python -m benchmarks.bench_ocr [--fixtures DIR] [--repeat 3] [--workers 4]
+"""
+
+import argparse
+import asyncio
+import difflib
+import io
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import pytesseract
+from PIL import Image, ImageDraw, ImageFont
+
+from src.image_analyser import ImageAnalyser, _ocr, _open_image, _recognize, tesserocr
+from src.image_preprocessing import preprocess_image
+from src.image_preprocessing import PreprocessOptions
+from src.text_utils import normalize_ocr_text
+
+CONFIGURATIONS = {
+    "none": None,
+    "default": PreprocessOptions(),
+    "binarize": PreprocessOptions(binarize=True),
+    "width 1200": PreprocessOptions(max_width=1200),
+}
+
+
+def load_fixtures(directory: Path) -> List[Tuple[str, bytes, str]]:
+    fixtures = []
+    for text_path in sorted(directory.glob("*.txt")):
+        for image_path in sorted(directory.glob(text_path.stem + ".*")):
+            if image_path.suffix != ".txt":
+                fixtures.append((image_path.name, image_path.read_bytes(), text_path.read_text()))
+                break
+    return fixtures
+
+
+def make_synthetic_menu(lines: int, width: int = 3000, height: int = 4000) -> Tuple[bytes, str]:
+    """Renders a menu page at phone camera resolution with a rotated EXIF orientation."""
+    text = "\n".join(f"Dish number {i} with tomato and basil  {i % 30 + 5}.99" for i in range(lines))
+    image = Image.new("RGB", (width, height), (235, 228, 210))
+    # Large enough to fill the page, small enough that the longest line fits its width
+    font_size = min(height // (lines * 2), width // 30)
+    font = ImageFont.load_default(size=font_size)
+    ImageDraw.Draw(image).multiline_text((width // 20, height // 20), text, fill=(30, 30, 30), font=font,
+                                         spacing=font_size)
+    # Stored sideways like a portrait photo taken by a phone, the EXIF orientation rotates it back
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    buffer = io.BytesIO()
+    image.rotate(90, expand=True).save(buffer, "JPEG", quality=90, exif=exif)
+    return buffer.getvalue(), text
+
+
+def accuracy(expected: str, actual: str) -> float:
+    return difflib.SequenceMatcher(None, normalize_ocr_text(expected), normalize_ocr_text(actual)).ratio()
+
+
+def run(name: str, content: bytes, expected: str, options: Optional[PreprocessOptions], repeat: int) -> None:
+    text = ""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        text = _ocr(content, ImageAnalyser.custom_config, options)
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{name:<24} {elapsed * 1000:9.1f} ms  accuracy {accuracy(expected, text) * 100:5.1f} %")
+
+
+def compare_engines(fixtures: List[Tuple[str, bytes, str]], repeat: int) -> None:
+    """Per-image latency of the preprocessed images, without decoding and preprocessing."""
+    config = ImageAnalyser.custom_config
+    engines = {"tesseract command": lambda image: pytesseract.image_to_string(image, config=config)}
+    if tesserocr is not None:
+        engines["tesserocr engine"] = lambda image: _recognize(image, config)
+        # Loading the language model happens once per worker process, not per image
+        _recognize(Image.new("L", (32, 32), 255), config)
+    else:
+        print("  tesserocr is not installed")
+    for name, content, expected in fixtures:
+        image = preprocess_image(_open_image(content), PreprocessOptions())
+        for label, recognize in engines.items():
+            text = ""
+            start = time.perf_counter()
+            for _ in range(repeat):
+                text = recognize(image)
+            elapsed = (time.perf_counter() - start) / repeat
+            print(f"  {name}, {label:<18} {elapsed * 1000:9.1f} ms  accuracy {accuracy(expected, text) * 100:5.1f} %")
+
+
+async def run_tiled(name: str, content: bytes, expected: str, analyser: ImageAnalyser, repeat: int) -> None:
+    # Warm up the worker pool, spawning it is not part of the OCR latency
+    await analyser.ocr_image_async(content)
+    text = ""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        text = await analyser.ocr_image_async(content)
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{name:<24} {elapsed * 1000:9.1f} ms  accuracy {accuracy(expected, text) * 100:5.1f} %")
+
+
+async def compare_tiles(fixtures: List[Tuple[str, bytes, str]], workers: int, repeat: int) -> None:
+    for tiles in sorted({1, workers}):
+        analyser = ImageAnalyser("unused", "unused", "http://localhost", ocr_workers=workers,
+                                 preprocess=PreprocessOptions(), ocr_tiles=tiles)
+        try:
+            for name, content, expected in fixtures:
+                await run_tiled(f"  {name}, {tiles} tiles", content, expected, analyser, repeat)
+        finally:
+            await analyser.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", type=Path)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=4, help="OCR worker processes for the tiling comparison")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        fixtures = load_fixtures(args.fixtures)
+    else:
+        fixtures = [("small menu", *make_synthetic_menu(8, 1200, 1600)), ("large menu", *make_synthetic_menu(30))]
+
+    for name, content, expected in fixtures:
+        print(name)
+        for label, options in CONFIGURATIONS.items():
+            run(f"  {label}", content, expected, options, args.repeat)
+
+    print("engines")
+    compare_engines(fixtures, args.repeat)
+
+    print(f"tiling with {args.workers} workers")
+    asyncio.run(compare_tiles(fixtures, args.workers, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
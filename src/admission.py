@@ -0,0 +1,121 @@
+"""Admission control in front of the expensive menu analysis."""
+
+import asyncio
+import math
+import time
+from typing import Dict, Optional
+
+# Weight of the latest sample in the moving averages of queue wait and service time
+_SMOOTHING = 0.2
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is turned away because too many requests are running or waiting."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """Slot of an admitted request. Released exactly once, by release() or when leaving the async with block."""
+
+    wait: float
+
+    def __init__(self, controller: "AdmissionController", wait: float):
+        self.wait = wait
+        self._controller = controller
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release(time.monotonic() - self._started)
+
+    async def __aenter__(self) -> "AdmissionTicket":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
+
+
+class AdmissionController:
+    """
+    Limits how many requests run at the same time. Further requests wait in a bounded FIFO queue:
+    if the queue is full they are rejected with 429, if they wait longer than queue_timeout with 503.
+    Both carry a Retry-After estimated from the recent service time.
+    """
+
+    max_concurrent: int
+    max_queued: int
+    queue_timeout: float
+
+    def __init__(self, max_concurrent: int, max_queued: int, queue_timeout: float):
+        """
+        :param max_concurrent: Number of requests running at the same time.
+        :param max_queued: Number of requests waiting for a slot, further requests are rejected right away.
+        :param queue_timeout: Seconds a request waits for a slot before it is rejected.
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._running = 0
+        self._waiting = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._average_wait = 0.0
+        self._average_service_time: Optional[float] = None
+
+    async def admit(self) -> AdmissionTicket:
+        """
+        Waits for a free slot.
+        :return: Ticket that must be released when the request is finished.
+        :raises AdmissionRejected: If the queue is full or the wait exceeded queue_timeout.
+        """
+        if self._semaphore.locked() and self._waiting >= self.max_queued:
+            self._rejected += 1
+            raise AdmissionRejected(429, "Too many requests, please retry later", self._retry_after())
+        self._waiting += 1
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise AdmissionRejected(503, "Server busy, please retry later", self._retry_after())
+        finally:
+            self._waiting -= 1
+        wait = time.monotonic() - started
+        self._running += 1
+        self._admitted += 1
+        self._average_wait += _SMOOTHING * (wait - self._average_wait)
+        return AdmissionTicket(self, wait)
+
+    def stats(self) -> Dict[str, float]:
+        """Current load and counters of admitted and rejected requests."""
+        return {
+            "running": self._running,
+            "waiting": self._waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+            "average_wait": self._average_wait,
+            "average_service_time": self._average_service_time or 0.0,
+        }
+
+    def _release(self, service_time: float) -> None:
+        self._running -= 1
+        if self._average_service_time is None:
+            self._average_service_time = service_time
+        else:
+            self._average_service_time += _SMOOTHING * (service_time - self._average_service_time)
+        self._semaphore.release()
+
+    def _retry_after(self) -> int:
+        """Seconds until the requests waiting now have probably been served, at least one."""
+        service_time = self._average_service_time or self.queue_timeout
+        return max(1, math.ceil(service_time * (self._waiting + 1) / self.max_concurrent))
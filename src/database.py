@@ -1,19 +1,58 @@
 import sqlite3
+import json
 import logging
-from typing import Optional
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .memory_cache import LRUCache
 
 logger = logging.getLogger("database")
 
+# Stay well below SQLite's limit of bound variables per statement
+MAX_QUERY_PARAMETERS = 500
+
+# Reasons for negative cache entries
+NO_RESULTS = "no_results"
+FETCH_ERROR = "error"
+
+# States of background jobs
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
 class ImageCacheDB:
     """Database class for managing image cache with a persistent connection."""
 
     db_path: str
     conn: sqlite3.Connection
+    lock: threading.Lock
+    jobs_conn: sqlite3.Connection
+    jobs_lock: threading.Lock
+    no_results_ttl: float
+    error_ttl: float
+    upload_cache_ttl: float
+    upload_cache_size: int
+    parse_cache_ttl: float
+    parse_cache_size: int
+    job_retention: float
 
-    def __init__(self, db_path: str) -> None:
+    def __init__(self, db_path: str, no_results_ttl: float = 86400.0, error_ttl: float = 300.0,
+                 upload_cache_ttl: float = 604800.0, upload_cache_size: int = 1000,
+                 parse_cache_ttl: float = 2592000.0, parse_cache_size: int = 5000,
+                 job_retention: float = 604800.0) -> None:
         self.db_path = db_path
+        self.no_results_ttl = no_results_ttl
+        self.error_ttl = error_ttl
+        self.upload_cache_ttl = upload_cache_ttl
+        self.upload_cache_size = upload_cache_size
+        self.parse_cache_ttl = parse_cache_ttl
+        self.parse_cache_size = parse_cache_size
+        self.job_retention = job_retention
         logger.info(f"Initialisiere Datenbankverbindung zu: {db_path}")
         self.conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False)
+        # The connection is shared between worker threads, serialise access to it
+        self.lock = threading.Lock()
         self.conn.execute("PRAGMA foreign_keys = ON")
         self.conn.execute("PRAGMA journal_mode = WAL")
         cursor: sqlite3.Cursor = self.conn.cursor()
@@ -28,7 +67,62 @@ class ImageCacheDB:
         cursor.execute('''
             CREATE INDEX IF NOT EXISTS idx_keyword ON image_cache(keyword)
         ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS negative_cache (
+                keyword TEXT PRIMARY KEY,
+                reason TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS upload_cache (
+                content_hash TEXT PRIMARY KEY,
+                menu_items TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        # Replaced by upload_fingerprint, which also stores the text signature
+        cursor.execute('DROP TABLE IF EXISTS upload_phash')
+        # Fingerprints without their analysis key belong to uploads that are no longer looked up
+        columns: List[str] = [row[1] for row in cursor.execute('PRAGMA table_info(upload_fingerprint)')]
+        if columns and 'analysis_key' not in columns:
+            cursor.execute('DROP TABLE upload_fingerprint')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS upload_fingerprint (
+                content_hash TEXT PRIMARY KEY REFERENCES upload_cache(content_hash) ON DELETE CASCADE,
+                analysis_key TEXT NOT NULL,
+                phash TEXT NOT NULL,
+                signature BLOB NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS parse_cache (
+                text_key TEXT PRIMARY KEY,
+                menu_items TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                content BLOB,
+                content_hash TEXT NOT NULL,
+                webhook_url TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)
+        ''')
         self.conn.commit()
+        # Jobs store their input images of up to several MB, writing them must not hold up cache lookups
+        self.jobs_conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False)
+        self.jobs_lock = threading.Lock()
         logger.info("Datenbank erfolgreich initialisiert.")
 
     def get_image_url(self, keyword: str) -> Optional[str]:
@@ -38,9 +132,10 @@ class ImageCacheDB:
             return None
         try:
             logger.debug(f"Suche Cache für Keyword: '{keyword}'")
-            cursor: sqlite3.Cursor = self.conn.cursor()
-            cursor.execute('SELECT image_url FROM image_cache WHERE keyword = ?', (keyword.lower(),))
-            result: Optional[tuple] = cursor.fetchone()
+            with self.lock:
+                cursor: sqlite3.Cursor = self.conn.cursor()
+                cursor.execute('SELECT image_url FROM image_cache WHERE keyword = ?', (keyword.lower(),))
+                result: Optional[tuple] = cursor.fetchone()
             if result:
                 logger.info(f"Cache-Treffer für Keyword: '{keyword}'")
                 return result[0]
@@ -51,6 +146,28 @@ class ImageCacheDB:
             logger.error(f"Datenbankfehler: {e}")
             return None
 
+    def get_image_urls(self, keywords: List[str]) -> Dict[str, str]:
+        """Get cached image URLs for several keywords at once. Returns a dict of keyword -> URL for all hits."""
+        unique_keywords: List[str] = list(dict.fromkeys(kw.lower() for kw in keywords if kw))
+        if not unique_keywords:
+            return {}
+        try:
+            logger.debug(f"Suche Cache für {len(unique_keywords)} Keywords")
+            results: Dict[str, str] = {}
+            with self.lock:
+                cursor: sqlite3.Cursor = self.conn.cursor()
+                for start in range(0, len(unique_keywords), MAX_QUERY_PARAMETERS):
+                    chunk: List[str] = unique_keywords[start:start + MAX_QUERY_PARAMETERS]
+                    placeholders: str = ", ".join("?" * len(chunk))
+                    cursor.execute(
+                        f'SELECT keyword, image_url FROM image_cache WHERE keyword IN ({placeholders})', chunk)
+                    results.update(cursor.fetchall())
+            logger.info(f"Cache-Treffer für {len(results)} von {len(unique_keywords)} Keywords")
+            return results
+        except sqlite3.Error as e:
+            logger.error(f"Datenbankfehler: {e}")
+            return {}
+
     def save_image_url(self, keyword: str, image_url: str) -> bool:
         """Save image URL to cache. Returns True if successful."""
         if not keyword or not image_url:
@@ -58,24 +175,303 @@ class ImageCacheDB:
             return False
         try:
             logger.debug(f"Speichere in Cache - Keyword: '{keyword}', URL: {image_url}")
-            cursor: sqlite3.Cursor = self.conn.cursor()
-            cursor.execute('''
-                INSERT OR REPLACE INTO image_cache (keyword, image_url) 
-                VALUES (?, ?)
-            ''', (keyword.lower(), image_url))
-            self.conn.commit()
+            with self.lock:
+                cursor: sqlite3.Cursor = self.conn.cursor()
+                cursor.execute('''
+                    INSERT OR REPLACE INTO image_cache (keyword, image_url) 
+                    VALUES (?, ?)
+                ''', (keyword.lower(), image_url))
+                cursor.execute('DELETE FROM negative_cache WHERE keyword = ?', (keyword.lower(),))
+                self.conn.commit()
             logger.info(f"Bild-URL für Keyword '{keyword}' erfolgreich im Cache gespeichert.")
             return True
         except sqlite3.Error as e:
             logger.error(f"Fehler beim Speichern der Bild-URL für Keyword '{keyword}': {e}")
             return False
 
+    def save_image_urls(self, image_urls: Dict[str, str]) -> bool:
+        """Save several image URLs to cache in a single transaction. Returns True if successful."""
+        rows: List[tuple] = [(kw.lower(), url) for kw, url in image_urls.items() if kw and url]
+        if not rows:
+            return True
+        try:
+            logger.debug(f"Speichere {len(rows)} Bild-URLs im Cache")
+            with self.lock, self.conn:
+                self.conn.executemany('''
+                    INSERT OR REPLACE INTO image_cache (keyword, image_url) 
+                    VALUES (?, ?)
+                ''', rows)
+                self.conn.executemany(
+                    'DELETE FROM negative_cache WHERE keyword = ?', [(kw,) for kw, _ in rows])
+            logger.info(f"{len(rows)} Bild-URLs erfolgreich im Cache gespeichert.")
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Fehler beim Speichern von {len(rows)} Bild-URLs: {e}")
+            return False
+
+    def get_negative_entries(self, keywords: List[str]) -> Dict[str, str]:
+        """
+        Get unexpired negative cache entries for several keywords.
+        Returns a dict of keyword -> reason (NO_RESULTS or FETCH_ERROR).
+        """
+        unique_keywords: List[str] = list(dict.fromkeys(kw.lower() for kw in keywords if kw))
+        if not unique_keywords:
+            return {}
+        try:
+            results: Dict[str, str] = {}
+            with self.lock:
+                cursor: sqlite3.Cursor = self.conn.cursor()
+                for start in range(0, len(unique_keywords), MAX_QUERY_PARAMETERS):
+                    chunk: List[str] = unique_keywords[start:start + MAX_QUERY_PARAMETERS]
+                    placeholders: str = ", ".join("?" * len(chunk))
+                    cursor.execute(f'''
+                        SELECT keyword, reason FROM negative_cache
+                        WHERE keyword IN ({placeholders}) AND (
+                            (reason = ? AND created_at > datetime('now', ?))
+                            OR (reason = ? AND created_at > datetime('now', ?))
+                        )
+                    ''', (*chunk,
+                          NO_RESULTS, f"-{self.no_results_ttl} seconds",
+                          FETCH_ERROR, f"-{self.error_ttl} seconds"))
+                    results.update(cursor.fetchall())
+            if results:
+                logger.info(f"Negativ-Cache-Treffer für {len(results)} Keywords")
+            return results
+        except sqlite3.Error as e:
+            logger.error(f"Datenbankfehler: {e}")
+            return {}
+
+    def save_negative_entries(self, entries: Dict[str, str]) -> bool:
+        """Save negative cache entries (keyword -> reason) in a single transaction. Returns True if successful."""
+        rows: List[tuple] = [(kw.lower(), reason) for kw, reason in entries.items() if kw and reason]
+        if not rows:
+            return True
+        try:
+            with self.lock, self.conn:
+                self.conn.executemany('''
+                    INSERT OR REPLACE INTO negative_cache (keyword, reason)
+                    VALUES (?, ?)
+                ''', rows)
+            logger.info(f"{len(rows)} Negativ-Einträge erfolgreich im Cache gespeichert.")
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Fehler beim Speichern von {len(rows)} Negativ-Einträgen: {e}")
+            return False
+
+    def get_upload_menu(self, content_hash: str) -> Optional[List[dict]]:
+        """
+        Get the cached menu items analysed from an uploaded image with the given key,
+        see ImageAnalyser.upload_cache_key.
+        """
+        return self._get_menu('upload_cache', 'content_hash', content_hash, self.upload_cache_ttl)
+
+    def save_upload_menu(self, content_hash: str, menu_items: List[dict],
+                         fingerprint: Optional[Tuple[int, bytes]] = None, analysis_key: str = "") -> bool:
+        """
+        Save the menu items analysed from an uploaded image. Returns True if successful.
+        If the perceptual hash and text signature of the image are given, near-duplicates of it
+        analysed with the same analysis key find the upload via find_similar_uploads.
+        """
+        if not self._save_menu('upload_cache', 'content_hash', content_hash, menu_items, self.upload_cache_size):
+            return False
+        if fingerprint is None:
+            return True
+        phash, signature = fingerprint
+        try:
+            with self.lock, self.conn:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO upload_fingerprint (content_hash, analysis_key, phash, signature) '
+                    'VALUES (?, ?, ?, ?)',
+                    (content_hash, analysis_key, format(phash, "x"), signature))
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Fehler beim Speichern des Wahrnehmungs-Hashes für '{content_hash}': {e}")
+            return False
+
+    def find_similar_uploads(self, phash: int, analysis_key: str, max_distance: int,
+                             limit: int) -> List[Tuple[str, bytes]]:
+        """
+        Get the keys and text signatures of the uploads previously analysed with analysis_key whose perceptual
+        hash has a Hamming distance of at most max_distance to phash, at most limit of them, the closest first.
+        """
+        try:
+            with self.lock:
+                cursor: sqlite3.Cursor = self.conn.cursor()
+                # The number of uploads is bounded by upload_cache_size, so a scan is cheap
+                cursor.execute('''
+                    SELECT f.content_hash, f.phash FROM upload_fingerprint f
+                    JOIN upload_cache u ON u.content_hash = f.content_hash
+                    WHERE f.analysis_key = ? AND u.created_at > datetime('now', ?)
+                ''', (analysis_key, f"-{self.upload_cache_ttl} seconds"))
+                candidates: List[tuple] = cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Datenbankfehler: {e}")
+            return []
+        distances: List[Tuple[int, str]] = []
+        for content_hash, stored_phash in candidates:
+            distance: int = bin(phash ^ int(stored_phash, 16)).count("1")
+            if distance <= max_distance:
+                distances.append((distance, content_hash))
+        distances.sort()
+        closest: List[str] = [content_hash for _, content_hash in distances[:limit]]
+        if not closest:
+            return []
+        logger.info(f"{len(distances)} ähnliche Uploads gefunden (kleinste Hamming-Distanz {distances[0][0]})")
+        try:
+            with self.lock:
+                cursor = self.conn.cursor()
+                placeholders: str = ", ".join("?" * len(closest))
+                cursor.execute(
+                    f'SELECT content_hash, signature FROM upload_fingerprint WHERE content_hash IN ({placeholders})',
+                    closest)
+                signatures: Dict[str, bytes] = dict(cursor.fetchall())
+        except sqlite3.Error as e:
+            logger.error(f"Datenbankfehler: {e}")
+            return []
+        return [(content_hash, signatures[content_hash]) for content_hash in closest if content_hash in signatures]
+
+    def get_parsed_menu(self, text_key: str) -> Optional[List[dict]]:
+        """Get the cached menu items the AI model parsed from an OCR text with the given key."""
+        return self._get_menu('parse_cache', 'text_key', text_key, self.parse_cache_ttl)
+
+    def save_parsed_menu(self, text_key: str, menu_items: List[dict]) -> bool:
+        """Save the menu items the AI model parsed from an OCR text. Returns True if successful."""
+        return self._save_menu('parse_cache', 'text_key', text_key, menu_items, self.parse_cache_size)
+
+    def _get_menu(self, table: str, key_column: str, key: str, ttl: float) -> Optional[List[dict]]:
+        """Get unexpired menu items stored under a key in one of the menu cache tables."""
+        try:
+            with self.lock:
+                cursor: sqlite3.Cursor = self.conn.cursor()
+                cursor.execute(
+                    f"SELECT menu_items FROM {table} WHERE {key_column} = ? AND created_at > datetime('now', ?)",
+                    (key, f"-{ttl} seconds"))
+                result: Optional[tuple] = cursor.fetchone()
+            if result:
+                logger.info(f"Cache-Treffer in {table} für '{key}'")
+                return json.loads(result[0])
+            logger.info(f"Cache-Miss in {table} für '{key}'")
+            return None
+        except (sqlite3.Error, ValueError) as e:
+            logger.error(f"Datenbankfehler: {e}")
+            return None
+
+    def _save_menu(self, table: str, key_column: str, key: str, menu_items: List[dict], max_entries: int) -> bool:
+        """Save menu items under a key, evicting the oldest entries beyond max_entries."""
+        try:
+            with self.lock, self.conn:
+                self.conn.execute(
+                    f"INSERT OR REPLACE INTO {table} ({key_column}, menu_items) VALUES (?, ?)",
+                    (key, json.dumps(menu_items)))
+                self.conn.execute(f'''
+                    DELETE FROM {table} WHERE {key_column} NOT IN (
+                        SELECT {key_column} FROM {table} ORDER BY created_at DESC, rowid DESC LIMIT ?
+                    )
+                ''', (max_entries,))
+            logger.info(f"Menü für '{key}' erfolgreich in {table} gespeichert.")
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Fehler beim Speichern des Menüs für '{key}' in {table}: {e}")
+            return False
+
+    def create_job(self, job_id: str, content: bytes | bytearray, content_hash: str,
+                   webhook_url: Optional[str] = None) -> bool:
+        """
+        Save a new queued job with its input image. Finished jobs older than job_retention
+        are deleted on the way. Returns True if successful.
+        """
+        try:
+            with self.jobs_lock, self.jobs_conn:
+                self.jobs_conn.execute('''
+                    DELETE FROM jobs WHERE status IN (?, ?) AND updated_at <= datetime('now', ?)
+                ''', (JOB_DONE, JOB_FAILED, f"-{self.job_retention} seconds"))
+                self.jobs_conn.execute('''
+                    INSERT INTO jobs (id, status, content, content_hash, webhook_url)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (job_id, JOB_QUEUED, content, content_hash, webhook_url))
+            logger.info(f"Auftrag '{job_id}' erfolgreich gespeichert.")
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Fehler beim Speichern des Auftrags '{job_id}': {e}")
+            return False
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the state of a job without its input image, or None if it does not exist."""
+        try:
+            with self.jobs_lock:
+                cursor: sqlite3.Cursor = self.jobs_conn.cursor()
+                cursor.execute('''
+                    SELECT id, status, content_hash, webhook_url, attempts, result, error, created_at, updated_at
+                    FROM jobs WHERE id = ?
+                ''', (job_id,))
+                result: Optional[tuple] = cursor.fetchone()
+            if result is None:
+                return None
+            job: Dict[str, Any] = dict(zip(
+                ("id", "status", "content_hash", "webhook_url", "attempts", "result", "error",
+                 "created_at", "updated_at"), result))
+            job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+            return job
+        except (sqlite3.Error, ValueError) as e:
+            logger.error(f"Datenbankfehler: {e}")
+            return None
+
+    def start_job(self, job_id: str) -> Optional[bytes]:
+        """Mark a job as running and count the attempt. Returns its input image, or None if it is not available."""
+        try:
+            with self.jobs_lock, self.jobs_conn:
+                self.jobs_conn.execute('''
+                    UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ? AND content IS NOT NULL
+                ''', (JOB_RUNNING, job_id))
+                cursor: sqlite3.Cursor = self.jobs_conn.execute('SELECT content FROM jobs WHERE id = ?', (job_id,))
+                result: Optional[tuple] = cursor.fetchone()
+            return result[0] if result else None
+        except sqlite3.Error as e:
+            logger.error(f"Fehler beim Starten des Auftrags '{job_id}': {e}")
+            return None
+
+    def finish_job(self, job_id: str, result: Optional[List[dict]] = None, error: Optional[str] = None) -> bool:
+        """
+        Mark a job as done with its result, or as failed if an error is given.
+        The input image is not needed anymore and is dropped. Returns True if successful.
+        """
+        status: str = JOB_FAILED if error is not None else JOB_DONE
+        try:
+            with self.jobs_lock, self.jobs_conn:
+                self.jobs_conn.execute('''
+                    UPDATE jobs SET status = ?, result = ?, error = ?, content = NULL, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (status, json.dumps(result) if result is not None else None, error, job_id))
+            logger.info(f"Auftrag '{job_id}' abgeschlossen: {status}")
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Fehler beim Abschließen des Auftrags '{job_id}': {e}")
+            return False
+
+    def get_unfinished_jobs(self) -> List[Dict[str, Any]]:
+        """Get id and attempts of the queued and running jobs, oldest first."""
+        try:
+            with self.jobs_lock:
+                cursor: sqlite3.Cursor = self.jobs_conn.cursor()
+                cursor.execute('''
+                    SELECT id, attempts FROM jobs WHERE status IN (?, ?) ORDER BY created_at, rowid
+                ''', (JOB_QUEUED, JOB_RUNNING))
+                return [{"id": job_id, "attempts": attempts} for job_id, attempts in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"Datenbankfehler: {e}")
+            return []
+
     def clear(self) -> bool:
         """Clear all cache entries. Returns True if successful."""
         try:
-            cursor: sqlite3.Cursor = self.conn.cursor()
-            cursor.execute('DELETE FROM image_cache')
-            self.conn.commit()
+            with self.lock:
+                cursor: sqlite3.Cursor = self.conn.cursor()
+                cursor.execute('DELETE FROM image_cache')
+                cursor.execute('DELETE FROM negative_cache')
+                cursor.execute('DELETE FROM upload_cache')
+                cursor.execute('DELETE FROM parse_cache')
+                self.conn.commit()
             logger.info("Cache erfolgreich geleert.")
             return True
         except sqlite3.Error as e:
@@ -83,8 +479,71 @@ class ImageCacheDB:
             return False
 
     def close(self) -> None:
-        """Close the database connection."""
+        """Close the database connections."""
         if self.conn:
             logger.info("Schließe Datenbankverbindung.")
             self.conn.close()
-            logger.debug("Datenbankverbindung erfolgreich geschlossen.")
\ No newline at end of file
+            self.jobs_conn.close()
+            logger.debug("Datenbankverbindung erfolgreich geschlossen.")
+
+
+class CachedImageCacheDB(ImageCacheDB):
+    """Image cache with an in-memory LRU layer in front of the SQLite database."""
+
+    memory_cache: LRUCache[str]
+
+    def __init__(self, db_path: str, memory_cache_size: int, memory_cache_ttl: float, **kwargs) -> None:
+        """Further keyword arguments are passed on to ImageCacheDB."""
+        super().__init__(db_path, **kwargs)
+        self.memory_cache = LRUCache(memory_cache_size, memory_cache_ttl)
+
+    def get_image_url(self, keyword: str) -> Optional[str]:
+        """Get cached image URL for a keyword, consulting the memory cache first."""
+        if not keyword:
+            return super().get_image_url(keyword)
+        image_url: Optional[str] = self.memory_cache.get(keyword.lower())
+        if image_url is not None:
+            logger.debug(f"Speicher-Cache-Treffer für Keyword: '{keyword}'")
+            return image_url
+        image_url = super().get_image_url(keyword)
+        if image_url is not None:
+            self.memory_cache.set(keyword.lower(), image_url)
+        return image_url
+
+    def get_image_urls(self, keywords: List[str]) -> Dict[str, str]:
+        """Get cached image URLs for several keywords, querying the database only for memory cache misses."""
+        results: Dict[str, str] = {}
+        misses: List[str] = []
+        for keyword in dict.fromkeys(kw.lower() for kw in keywords if kw):
+            image_url: Optional[str] = self.memory_cache.get(keyword)
+            if image_url is not None:
+                results[keyword] = image_url
+            else:
+                misses.append(keyword)
+        if misses:
+            db_results: Dict[str, str] = super().get_image_urls(misses)
+            for keyword, image_url in db_results.items():
+                self.memory_cache.set(keyword, image_url)
+            results.update(db_results)
+        return results
+
+    def save_image_url(self, keyword: str, image_url: str) -> bool:
+        """Save image URL to the database and the memory cache."""
+        if not super().save_image_url(keyword, image_url):
+            return False
+        self.memory_cache.set(keyword.lower(), image_url)
+        return True
+
+    def save_image_urls(self, image_urls: Dict[str, str]) -> bool:
+        """Save several image URLs to the database and the memory cache."""
+        if not super().save_image_urls(image_urls):
+            return False
+        for keyword, image_url in image_urls.items():
+            if keyword and image_url:
+                self.memory_cache.set(keyword.lower(), image_url)
+        return True
+
+    def clear(self) -> bool:
+        """Clear the memory cache and all database cache entries."""
+        self.memory_cache.clear()
+        return super().clear()
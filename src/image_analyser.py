@@ -1,15 +1,211 @@
-from PIL import Image
-from openai import OpenAI
+from PIL import Image, ImageChops, ImageFilter
+from openai import OpenAI, AsyncOpenAI, DefaultAsyncHttpxClient
 import pytesseract
+import asyncio
+import hashlib
 import logging
 import json
+import multiprocessing
+import threading
+import zlib
+import httpx
+from concurrent.futures import ProcessPoolExecutor
 from json_repair import repair_json
 from io import BytesIO
+from typing import AsyncIterator, List, Optional, Tuple
+
+from .image_preprocessing import PreprocessOptions, otsu_threshold, preprocess_image
+from .json_stream import JSONObjectStreamParser
+from .ocr_tiles import Box, find_tiles, merge_tile_texts
+from .text_utils import normalize_ocr_text
+
+try:
+    # Keeps an initialized Tesseract engine in memory instead of starting the tesseract command for every image
+    import tesserocr
+except ImportError:
+    tesserocr = None
 
 logger = logging.getLogger("image_analyser")
 
+# Image that can be sent to an OCR worker process: a file path or the encoded image
+WorkerImageInput = str | bytes | bytearray
+# Images read in this process can also be a memoryview
+ImageInput = WorkerImageInput | memoryview
+
+# Tesseract engines of the current thread by config, a tesserocr engine must not be shared between threads
+_engines = threading.local()
+
+
+def _open_image(image_input: ImageInput) -> Image.Image:
+    if isinstance(image_input, str):
+        return Image.open(image_input)
+    elif isinstance(image_input, (bytes, bytearray, memoryview)):
+        return Image.open(BytesIO(image_input))
+    raise ValueError("image_input must be either a file path (str) or image bytes (bytes-like)")
+
+
+def _ocr(image_input: ImageInput, config: str, preprocess: Optional[PreprocessOptions] = None) -> str:
+    """
+    Reads an image and extracts text using OCR.
+    Module level so it can be dispatched to worker processes.
+    """
+    image = _open_image(image_input)
+    if preprocess is not None:
+        image = preprocess_image(image, preprocess)
+    return _recognize(image, config)
+
+
+def _recognize(image: Image.Image, config: str) -> str:
+    """
+    Extracts the text of an image with the Tesseract engine of this thread,
+    or with the tesseract command if tesserocr is not installed.
+    """
+    if tesserocr is None:
+        return pytesseract.image_to_string(image, config=config)
+    engine = _get_engine(config)
+    if image.mode in ("L", "RGB"):
+        # Raw pixels spare encoding the image for Tesseract
+        bytes_per_pixel = len(image.mode)
+        engine.SetImageBytes(image.tobytes(), image.width, image.height,
+                             bytes_per_pixel, image.width * bytes_per_pixel)
+    else:
+        engine.SetImage(image)
+    return engine.GetUTF8Text()
+
+
+def _get_engine(config: str) -> "tesserocr.PyTessBaseAPI":
+    """Returns the Tesseract engine of this thread for a command line config, loading the language model on first use."""
+    engines = getattr(_engines, "by_config", None)
+    if engines is None:
+        engines = _engines.by_config = {}
+    if config not in engines:
+        options = config.split()
+        lang, psm, oem = "eng", tesserocr.PSM.AUTO, tesserocr.OEM.DEFAULT
+        variables = {}
+        for option, value in zip(options, options[1:]):
+            if option == "-l":
+                lang = value
+            elif option == "--psm":
+                psm = int(value)
+            elif option == "--oem":
+                oem = int(value)
+            elif option == "-c":
+                name, _, variable_value = value.partition("=")
+                variables[name] = variable_value
+        engine = tesserocr.PyTessBaseAPI(lang=lang, psm=psm, oem=oem)
+        for name, variable_value in variables.items():
+            engine.SetVariable(name, variable_value)
+        engines[config] = engine
+    return engines[config]
+
+
+def _init_ocr_worker(config: str) -> None:
+    """Loads the Tesseract engine when an OCR worker process starts, so the first image does not wait for it."""
+    if tesserocr is None:
+        return
+    try:
+        _get_engine(config)
+    except RuntimeError as e:
+        # Raised again with the first image, a failing initializer would break the whole pool
+        logger.error(f"Failed to initialize Tesseract: {e}")
+
+
+# Box of a tile and its pixels as mode, size and raw bytes, which are cheaper to send to a worker than an encoded image
+Tile = Tuple[Box, str, Tuple[int, int], bytes]
+
+
+def _prepare_tiles(image_input: ImageInput, preprocess: Optional[PreprocessOptions],
+                   max_tiles: int, min_tile_height: int) -> List[Tile]:
+    """
+    Reads and preprocesses an image and splits it into tiles for parallel OCR.
+    Module level so it can be dispatched to worker processes.
+    """
+    image = _open_image(image_input)
+    if preprocess is not None:
+        image = preprocess_image(image, preprocess)
+    tiles = []
+    for box in find_tiles(image, max_tiles, min_tile_height):
+        tile = image.crop(box)
+        tiles.append((box, tile.mode, tile.size, tile.tobytes()))
+    return tiles
+
+
+def _ocr_tile(tile: Tile, config: str) -> str:
+    """
+    Extracts the text of a tile returned by _prepare_tiles.
+    Module level so it can be dispatched to worker processes.
+    """
+    _, mode, size, data = tile
+    return _recognize(Image.frombytes(mode, size, data), config)
+
+
+# Edge length of the perceptual hash grid. Menus are mostly text on a plain background,
+# a 16x16 grid (256 bits) still tells different menus with the same layout apart where 8x8 does not.
+PHASH_SIZE = 16
+
+
+# Size of the black and white thumbnail compared to confirm a near-duplicate. Large enough that
+# changed digits of a price on a phone photo of a menu still differ by a few pixels.
+SIGNATURE_SIZE = (768, 1024)
+# Height in pixels of the bands of the thumbnail, about one line of menu text
+SIGNATURE_BAND_HEIGHT = 16
+
+
+def _fingerprint(image_input: ImageInput) -> Tuple[int, bytes]:
+    """
+    Computes the perceptual hash and the text signature of an image, used to find near-duplicate uploads.
+    The perceptual hash is a difference hash: the image is reduced to grayscale pixels and each bit
+    tells whether a pixel is brighter than its right neighbour. Re-encoded or rescaled copies of an
+    image have hashes with a small Hamming distance, but so have menus that only differ in their text.
+    The text signature is a compressed black and white thumbnail, compared by text_signatures_match.
+    Module level so it can be dispatched to worker processes.
+    """
+    image = _open_image(image_input)
+    # Let JPEG decoding skip most of the resolution, only thumbnails are needed
+    image.draft("L", SIGNATURE_SIZE)
+    image = image.convert("L")
+
+    width = PHASH_SIZE + 1
+    pixels = image.resize((width, PHASH_SIZE), Image.Resampling.LANCZOS).tobytes()
+    phash = 0
+    for row in range(PHASH_SIZE):
+        for col in range(PHASH_SIZE):
+            phash = (phash << 1) | (pixels[row * width + col] > pixels[row * width + col + 1])
+
+    thumbnail = image.resize(SIGNATURE_SIZE, Image.Resampling.BOX)
+    threshold = otsu_threshold(thumbnail.histogram())
+    signature = thumbnail.point(lambda value: 255 if value > threshold else 0).convert("1")
+    return phash, zlib.compress(signature.tobytes())
+
+
+def text_signatures_match(first: bytes, second: bytes, max_band_difference: int) -> bool:
+    """
+    Compares the text signatures of two images band by band. Ink of one image counts as different
+    where the other image has no ink within one pixel, so the jagged edges of re-encoded or rescaled
+    copies do not, but changed words or digits do.
+    :param first: Text signature of an image, as computed by _fingerprint.
+    :param second: Text signature of the other image.
+    :param max_band_difference: Number of different pixels allowed in each band.
+    :return: True if no band has more different pixels.
+    """
+    images = [Image.frombytes("1", SIGNATURE_SIZE, zlib.decompress(signature)).convert("L")
+              for signature in (first, second)]
+    # Ink is black, the minimum filter grows it by one pixel in each direction
+    grown = [image.filter(ImageFilter.MinFilter(3)) for image in images]
+    # White (255) where one image has ink and the other has none nearby
+    different = ImageChops.lighter(ImageChops.subtract(grown[1], images[0]),
+                                   ImageChops.subtract(grown[0], images[1]))
+    width, height = SIGNATURE_SIZE
+    for top in range(0, height, SIGNATURE_BAND_HEIGHT):
+        band = different.crop((0, top, width, top + SIGNATURE_BAND_HEIGHT))
+        if band.histogram()[255] > max_band_difference:
+            return False
+    return True
+
 class ImageAnalyser:
     custom_config = r'--oem 3 --psm 6 -l eng'
+    # Increase when changing ai_question, so cached parse results of the old prompt are not reused
+    prompt_version = "1"
     ai_question = """Extract menu items, descriptions and prices from this OCR text. Return only valid JSON in the following form:
     [{
         "name": "Grilled Chicken Caesar Salad",
@@ -22,14 +218,36 @@ class ImageAnalyser:
     Ignore any text that is not a menu item, description or price. If you cannot extract any items, return an empty array.
     """
 
-    def __init__(self, ai_model: str, api_key: str, base_url: str):
+    def __init__(self, ai_model: str, api_key: str, base_url: str, ocr_workers: int = 2,
+                 ai_timeout: float = 60.0, ai_max_retries: int = 2, ai_max_connections: int = 20,
+                 preprocess: Optional[PreprocessOptions] = None, ocr_tiles: int = 1,
+                 ocr_tile_min_height: int = 300):
+        """
+        :param ocr_workers: Number of worker processes running OCR for analyse_image_async.
+        :param ai_timeout: Seconds to wait for the AI model before giving up.
+        :param ai_max_retries: Number of retries of failed AI requests.
+        :param ai_max_connections: Maximum number of concurrent connections of the async AI client.
+        :param preprocess: Preprocessing applied to images before OCR, None passes them on unchanged.
+        :param ocr_tiles: Maximum number of bands ocr_image_async splits a page into to OCR them in parallel, 1 disables tiling.
+        :param ocr_tile_min_height: Minimum height in pixels of a band.
+        """
         self.ai_model = ai_model
-        self.client = OpenAI(base_url=base_url, api_key=api_key)
+        self.client = OpenAI(base_url=base_url, api_key=api_key,
+                             timeout=ai_timeout, max_retries=ai_max_retries)
+        self.async_client = AsyncOpenAI(
+            base_url=base_url, api_key=api_key, timeout=ai_timeout, max_retries=ai_max_retries,
+            http_client=DefaultAsyncHttpxClient(limits=httpx.Limits(
+                max_connections=ai_max_connections, max_keepalive_connections=ai_max_connections)))
+        self.ocr_workers = ocr_workers
+        self.preprocess = preprocess
+        self.ocr_tiles = ocr_tiles
+        self.ocr_tile_min_height = ocr_tile_min_height
+        self._ocr_pool: Optional[ProcessPoolExecutor] = None
 
-    def analyse_image(self, image_input: str | bytes) -> list:
+    def analyse_image(self, image_input: ImageInput) -> list:
         """
         Analyzes an image to extract menu items using OCR and AI.
-        :param image_input: Either a file path (str) or image bytes (bytes).
+        :param image_input: Either a file path (str) or the image bytes (bytes-like).
         :return: List of menu items as dictionaries.
         """
         logger.info("Reading image")
@@ -37,20 +255,62 @@ class ImageAnalyser:
         logger.info(f"Extracted text: {text}")
         return self.parse_text_ai(text)
 
-    def ocr_image(self, image_input: str | bytes) -> str:
+    async def analyse_image_async(self, image_input: WorkerImageInput) -> list:
+        """
+        Like analyse_image, but keeps the event loop free: OCR runs in a worker
+        process and the AI model is called with the async client.
+        :param image_input: A file path (str) or the image bytes (bytes or bytearray), sent to a worker process.
+        :return: List of menu items as dictionaries.
+        """
+        logger.info("Reading image")
+        text = await self.ocr_image_async(image_input)
+        logger.info(f"Extracted text: {text}")
+        return await self.parse_text_ai_async(text)
+
+    def ocr_image(self, image_input: ImageInput) -> str:
         """
         Reads an image and extracts text using OCR.
-        :param image_input: Either a file path (str) or image bytes (bytes).
+        :param image_input: Either a file path (str) or the image bytes (bytes-like).
         :return: Extracted text from the image.
         """
-        if isinstance(image_input, str):
-            image = Image.open(image_input)
-        elif isinstance(image_input, bytes):
-            image = Image.open(BytesIO(image_input))
-        else:
-            raise ValueError("image_input must be either a file path (str) or image bytes (bytes)")
-        
-        return pytesseract.image_to_string(image, config=self.custom_config)
+        return _ocr(image_input, self.custom_config, self.preprocess)
+
+    async def ocr_image_async(self, image_input: WorkerImageInput) -> str:
+        """
+        Like ocr_image, but runs OCR in worker processes. If tiling is enabled, the page is split
+        into horizontal bands that are read in parallel and their text is joined top to bottom.
+        :param image_input: A file path (str) or the image bytes (bytes or bytearray), sent to a worker process.
+        :return: Extracted text from the image.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self._get_ocr_pool()
+        if self.ocr_tiles <= 1:
+            return await loop.run_in_executor(pool, _ocr, image_input, self.custom_config, self.preprocess)
+        tiles = await loop.run_in_executor(
+            pool, _prepare_tiles, image_input, self.preprocess,
+            self.ocr_tiles, self.ocr_tile_min_height)
+        texts = await asyncio.gather(*(
+            loop.run_in_executor(pool, _ocr_tile, tile, self.custom_config) for tile in tiles))
+        logger.info(f"Read {len(tiles)} OCR tiles")
+        return merge_tile_texts(texts)
+
+    def fingerprint(self, image_input: ImageInput) -> Tuple[int, bytes]:
+        """
+        Computes the perceptual hash and the text signature of an image to detect near-duplicate uploads.
+        :param image_input: Either a file path (str) or the image bytes (bytes-like).
+        :return: 256 bit hash, similar images differ in few bits, and the text signature,
+                 which confirms that two similar images show the same text via text_signatures_match.
+        """
+        return _fingerprint(image_input)
+
+    async def fingerprint_async(self, image_input: WorkerImageInput) -> Tuple[int, bytes]:
+        """
+        Like fingerprint, but runs in a worker process.
+        :param image_input: A file path (str) or the image bytes (bytes or bytearray), sent to a worker process.
+        :return: 256 bit hash and text signature.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_ocr_pool(), _fingerprint, image_input)
 
     def parse_text_ai(self, text: str) -> list:
         """
@@ -62,13 +322,94 @@ class ImageAnalyser:
         completion = self.client.chat.completions.create(
             extra_body={},
             model=self.ai_model,
-            messages=[{
-                "role": "user",
-                "content": f"{self.ai_question}\n\n{text}"
-            }])
+            messages=self._ai_messages(text))
+        return self._parse_ai_response(completion.choices[0].message.content)
+
+    async def parse_text_ai_async(self, text: str) -> list:
+        """
+        Like parse_text_ai, but uses the async client so waiting for the AI model does not block a worker.
+        :param text: Extracted text from the image.
+        :return: List of menu items as dictionaries.
+        """
+        logger.info("Calling AI model...")
+        completion = await self.async_client.chat.completions.create(
+            extra_body={},
+            model=self.ai_model,
+            messages=self._ai_messages(text))
+        return self._parse_ai_response(completion.choices[0].message.content)
 
-        # Validate the response
-        content = completion.choices[0].message.content
+    async def stream_menu_items(self, text: str) -> AsyncIterator[dict]:
+        """
+        Calls the AI model with a streamed response and yields each menu item
+        as soon as its JSON object is complete, while the model is still generating.
+        :param text: Extracted text from the image.
+        :return: Async iterator of validated menu items as dictionaries.
+        """
+        logger.info("Calling AI model (streaming)...")
+        stream = await self.async_client.chat.completions.create(
+            extra_body={},
+            model=self.ai_model,
+            messages=self._ai_messages(text),
+            stream=True)
+        parser = JSONObjectStreamParser()
+        seen: set = set()
+        count = 0
+        async with stream:
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                for item in self.validate_menu_items(parser.feed(chunk.choices[0].delta.content), seen):
+                    count += 1
+                    yield item
+        # A truncated response still yields its last item, as parse_text_ai_async would return it
+        for item in self.validate_menu_items(parser.close(), seen):
+            count += 1
+            yield item
+        logger.info(f"AI stream finished with {count} menu items.")
+
+    def parse_cache_key(self, text: str) -> str:
+        """
+        Key identifying the parse result of an OCR text: a hash of the normalized text,
+        the AI model and the prompt version.
+        :param text: Extracted text from the image.
+        :return: Hex digest usable as cache key.
+        """
+        key_source = f"{self.ai_model}\n{self.prompt_version}\n{normalize_ocr_text(text)}"
+        return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+    def analysis_key(self) -> str:
+        """
+        Key identifying the settings an analysis depends on: the AI model, the prompt version,
+        the OCR configuration, preprocessing and tiling.
+        :return: Hex digest usable as part of cache keys.
+        """
+        key_source = "\n".join(str(part) for part in (
+            self.ai_model, self.prompt_version, self.custom_config, self.preprocess,
+            self.ocr_tiles, self.ocr_tile_min_height))
+        return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+    def upload_cache_key(self, content_hash: str) -> str:
+        """
+        Key identifying the analysis of an uploaded image, so changing the analysis settings
+        does not keep returning analyses made with the old ones.
+        :param content_hash: SHA-256 hex digest of the image bytes.
+        :return: Hex digest usable as cache key.
+        """
+        key_source = f"{self.analysis_key()}\n{content_hash}"
+        return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+    def _ai_messages(self, text: str) -> list:
+        return [{
+            "role": "user",
+            "content": f"{self.ai_question}\n\n{text}"
+        }]
+
+    def _parse_ai_response(self, content: Optional[str]) -> list:
+        """
+        Validates the AI response and converts it to menu items.
+        :param content: Raw content of the AI response.
+        :return: List of menu items as dictionaries.
+        """
         print(f"AI response: {content}")  # Debugging output
         menu_items = []
         if content is not None:
@@ -88,15 +429,34 @@ class ImageAnalyser:
             logger.error("AI response content is None.")
         return menu_items
 
-    def validate_menu_items(self, items: list) -> list:
+    async def aclose(self) -> None:
+        """Shuts down the OCR worker pool and closes the AI clients."""
+        if self._ocr_pool is not None:
+            self._ocr_pool.shutdown(cancel_futures=True)
+            self._ocr_pool = None
+        self.client.close()
+        await self.async_client.close()
+
+    def _get_ocr_pool(self) -> ProcessPoolExecutor:
+        # Created on first use, spawned workers do not inherit the server's threads.
+        # Each worker keeps its Tesseract engine for all images it reads.
+        if self._ocr_pool is None:
+            self._ocr_pool = ProcessPoolExecutor(
+                max_workers=self.ocr_workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_ocr_worker, initargs=(self.custom_config,))
+        return self._ocr_pool
+
+    def validate_menu_items(self, items: list, seen: Optional[set] = None) -> list:
         """
         Validates menu items: Each entry must be a dict with 'name', 'description', and 'price'.
         Removes invalid entries and duplicates.
+        :param seen: Keys of items validated before, shared between calls when validating a stream.
         """
         if not isinstance(items, list):
             return []
         valid = []
-        seen = set()
+        if seen is None:
+            seen = set()
         for item in items:
             if not isinstance(item, dict):
                 continue
@@ -1,21 +1,82 @@
 """Google Images Search functionality for image URL retrieval."""
 
 import logging
-from google_images_search import GoogleImagesSearch
-from typing import Optional
+import httpx
+from typing import NoReturn, Optional
 
 logger = logging.getLogger("image_fetcher")
 
-class ImageFetcher:
-    """Class to handle Google Images search."""
+DEFAULT_CSE_BASE_URL = "https://www.googleapis.com/customsearch/v1"
+
+
+class ImageFetchError(Exception):
+    """Raised when an image search fails, as opposed to returning no results."""
+
+
+class _CustomSearchFetcher:
+    """Request building and response parsing shared by the sync and async fetchers."""
 
     api_key: str
     cse_id: str
+    base_url: str
 
-    def __init__(self, api_key: str, cse_id: str) -> None:
-        """Initialize with Google API credentials."""
+    def __init__(self, api_key: str, cse_id: str, base_url: str) -> None:
         self.api_key = api_key
         self.cse_id = cse_id
+        self.base_url = base_url
+
+    @staticmethod
+    def _limits(max_connections: int) -> httpx.Limits:
+        return httpx.Limits(max_connections=max_connections,
+                            max_keepalive_connections=max_connections)
+
+    def _search_params(self, keyword: str) -> dict:
+        """Query parameters of the Custom Search request for a keyword."""
+        return {
+            "key": self.api_key,
+            "cx": self.cse_id,
+            "q": keyword + " dish food",
+            "searchType": "image",
+            "num": 1,
+        }
+
+    def _extract_image_url(self, keyword: str, data: dict) -> Optional[str]:
+        """Return the first image URL of a Custom Search response."""
+        for image in data.get("items", []):
+            image_url: Optional[str] = image.get("link")
+            if image_url:
+                logger.info(f"Found image URL: {image_url}")
+                return image_url
+
+        logger.warning(f"No images found for '{keyword}'")
+        return None
+
+    def _raise_fetch_error(self, keyword: str, e: Exception) -> NoReturn:
+        """Log a failed search and raise it as ImageFetchError."""
+        if isinstance(e, httpx.HTTPStatusError):
+            # The request URL contains the API key, only report the status
+            message = f"HTTP {e.response.status_code}"
+        else:
+            message = str(e) or type(e).__name__
+        logger.error(f"Error fetching image for '{keyword}': {message}")
+        raise ImageFetchError(message) from e
+
+
+class ImageFetcher(_CustomSearchFetcher):
+    """Class to handle Google Images search through the Custom Search JSON API."""
+
+    client: httpx.Client
+
+    def __init__(self, api_key: str, cse_id: str, base_url: str = DEFAULT_CSE_BASE_URL,
+                 timeout: float = 10.0, max_connections: int = 20) -> None:
+        """
+        Initialize with Google API credentials.
+
+        The HTTP client is kept for the lifetime of the fetcher, so connections
+        to the search API are pooled and reused between lookups.
+        """
+        super().__init__(api_key, cse_id, base_url)
+        self.client = httpx.Client(timeout=timeout, limits=self._limits(max_connections))
 
     def fetch_image_url(self, keyword: str) -> Optional[str]:
         """
@@ -27,20 +88,95 @@ class ImageFetcher:
         Returns:
             Image URL if found, None otherwise
         """
+        try:
+            return self.search_image_url(keyword)
+        except ImageFetchError:
+            return None
+
+    def search_image_url(self, keyword: str) -> Optional[str]:
+        """
+        Search an image URL for a keyword on Google Images.
+
+        Args:
+            keyword: The search term for the image
+
+        Returns:
+            Image URL if found, None if the search returned no results
+
+        Raises:
+            ImageFetchError: If the search itself failed
+        """
         try:
             logger.info(f"Fetching image URL for '{keyword}' from Google API")
-            gis: GoogleImagesSearch = GoogleImagesSearch(self.api_key, self.cse_id)
-            search_query: str = keyword + " dish food"
-            logger.debug(f"Using search query: '{search_query}'")
-            gis.search({'q': search_query, 'num': 1})
+            params: dict = self._search_params(keyword)
+            logger.debug(f"Using search query: '{params['q']}'")
+            response: httpx.Response = self.client.get(self.base_url, params=params)
+            response.raise_for_status()
+            data: dict = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            self._raise_fetch_error(keyword, e)
+        return self._extract_image_url(keyword, data)
 
-            for image in gis.results():
-                logger.info(f"Found image URL: {image.url}")
-                return image.url
+    def close(self) -> None:
+        """Close the pooled HTTP connections."""
+        self.client.close()
 
-            logger.warning(f"No images found for '{keyword}'")
-            return None
 
-        except Exception as e:
-            logger.error(f"Error fetching image for '{keyword}': {e}")
+class AsyncImageFetcher(_CustomSearchFetcher):
+    """
+    Async variant of ImageFetcher.
+
+    Searches run on the event loop through a shared connection pool, so many
+    lookups can be in flight without occupying a worker thread each.
+    """
+
+    client: httpx.AsyncClient
+
+    def __init__(self, api_key: str, cse_id: str, base_url: str = DEFAULT_CSE_BASE_URL,
+                 timeout: float = 10.0, max_connections: int = 100) -> None:
+        """Initialize with Google API credentials and a pooled async HTTP client."""
+        super().__init__(api_key, cse_id, base_url)
+        self.client = httpx.AsyncClient(timeout=timeout, limits=self._limits(max_connections))
+
+    async def fetch_image_url(self, keyword: str) -> Optional[str]:
+        """
+        Fetch image URL for a keyword from Google Images.
+
+        Args:
+            keyword: The search term for the image
+
+        Returns:
+            Image URL if found, None otherwise
+        """
+        try:
+            return await self.search_image_url(keyword)
+        except ImageFetchError:
             return None
+
+    async def search_image_url(self, keyword: str) -> Optional[str]:
+        """
+        Search an image URL for a keyword on Google Images.
+
+        Args:
+            keyword: The search term for the image
+
+        Returns:
+            Image URL if found, None if the search returned no results
+
+        Raises:
+            ImageFetchError: If the search itself failed
+        """
+        try:
+            logger.info(f"Fetching image URL for '{keyword}' from Google API")
+            params: dict = self._search_params(keyword)
+            logger.debug(f"Using search query: '{params['q']}'")
+            response: httpx.Response = await self.client.get(self.base_url, params=params)
+            response.raise_for_status()
+            data: dict = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            self._raise_fetch_error(keyword, e)
+        return self._extract_image_url(keyword, data)
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP connections."""
+        await self.client.aclose()
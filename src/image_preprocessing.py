@@ -0,0 +1,94 @@
+"""Image preprocessing applied before OCR."""
+
+from dataclasses import dataclass
+from typing import List
+
+from PIL import Image, ImageOps
+
+# EXIF orientations that rotate the image by 90 or 270 degrees
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+_EXIF_ORIENTATION = 0x0112
+
+
+@dataclass(frozen=True)
+class PreprocessOptions:
+    """Steps applied to an image before OCR."""
+
+    # Downscale images wider than this many pixels, 0 keeps the original size
+    max_width: int = 2000
+    # Convert to grayscale
+    grayscale: bool = True
+    # Convert to black and white
+    binarize: bool = False
+    # Brightness separating black from white when binarizing, 0 chooses it per image (Otsu's method)
+    threshold: int = 0
+    # Rotate the image according to its EXIF orientation
+    fix_orientation: bool = True
+
+
+def preprocess_image(image: Image.Image, options: PreprocessOptions) -> Image.Image:
+    """
+    Prepares an image for OCR. Should be called on a freshly opened image, so that
+    JPEG images can be decoded directly at a reduced size.
+    :param image: Image to preprocess.
+    :param options: Steps to apply.
+    :return: The preprocessed image.
+    """
+    if options.max_width > 0:
+        _draft(image, options)
+    if options.fix_orientation:
+        image = ImageOps.exif_transpose(image)
+    if options.grayscale or options.binarize:
+        image = image.convert("L")
+    elif image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    if options.max_width > 0 and image.width > options.max_width:
+        height = round(image.height * options.max_width / image.width)
+        image = image.resize((options.max_width, height), Image.Resampling.LANCZOS)
+    if options.binarize:
+        threshold = options.threshold or otsu_threshold(image.histogram())
+        image = image.point(lambda value: 255 if value > threshold else 0)
+    return image
+
+
+def otsu_threshold(histogram: List[int]) -> int:
+    """
+    Computes the brightness threshold that best separates the two classes of a grayscale histogram.
+    :param histogram: Pixel counts of the 256 brightness values.
+    :return: Threshold, pixels brighter than it are white.
+    """
+    total = sum(histogram)
+    weighted_total = sum(value * count for value, count in enumerate(histogram))
+    background_count = 0
+    background_sum = 0
+    best_threshold = 127
+    best_variance = -1.0
+    for value, count in enumerate(histogram[:256]):
+        background_count += count
+        foreground_count = total - background_count
+        if background_count == 0:
+            continue
+        if foreground_count == 0:
+            break
+        background_sum += value * count
+        background_mean = background_sum / background_count
+        foreground_mean = (weighted_total - background_sum) / foreground_count
+        variance = background_count * foreground_count * (background_mean - foreground_mean) ** 2
+        if variance > best_variance:
+            best_variance = variance
+            best_threshold = value
+    return best_threshold
+
+
+def _draft(image: Image.Image, options: PreprocessOptions) -> None:
+    """Lets the JPEG decoder skip resolution that would be removed by downscaling anyway."""
+    if image.format != "JPEG":
+        return
+    width, height = image.size
+    if options.fix_orientation and image.getexif().get(_EXIF_ORIENTATION) in _TRANSPOSED_ORIENTATIONS:
+        width, height = height, width
+    if width <= options.max_width:
+        return
+    scale = options.max_width / width
+    target = (round(image.width * scale), round(image.height * scale))
+    image.draft("L" if options.grayscale or options.binarize else "RGB", target)
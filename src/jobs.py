@@ -0,0 +1,245 @@
+"""Background processing of uploaded menus, with job state persisted in the database."""
+
+import asyncio
+import ipaddress
+import logging
+import math
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+from urllib.parse import urlparse
+
+import httpx
+
+from .database import ImageCacheDB
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest job in the moving average of the job duration
+_SMOOTHING = 0.2
+
+# Analyses an uploaded image given its bytes and content hash, returns the menu items as JSON-compatible dicts
+JobProcessor = Callable[[bytes, str], Awaitable[List[dict]]]
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while max_queued jobs are already waiting for a worker."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Too many queued jobs, please retry later")
+        self.retry_after = retry_after
+
+
+class WebhookURLRejected(ValueError):
+    """Raised for a webhook URL the server must not post to."""
+
+
+class JobManager:
+    """
+    Runs upload analyses in the background on a fixed number of worker tasks. Jobs, including
+    their input image, are stored in the database, so unfinished jobs are resumed after a restart.
+    When a job finishes, its state is posted to the job's webhook URL, if it has one.
+    """
+
+    db: ImageCacheDB
+    process: JobProcessor
+    workers: int
+    max_queued: int
+    max_attempts: int
+    webhook_retries: int
+    webhook_allowed_hosts: frozenset
+
+    def __init__(self, db: ImageCacheDB, process: JobProcessor, workers: int = 2, max_queued: int = 100,
+                 max_attempts: int = 3, webhook_timeout: float = 10.0, webhook_retries: int = 3,
+                 webhook_allowed_hosts: Iterable[str] = ()):
+        """
+        :param db: Database storing the jobs.
+        :param process: Coroutine function analysing an uploaded image.
+        :param workers: Number of jobs processed at the same time.
+        :param max_queued: Number of jobs waiting for a worker, further jobs are rejected.
+        :param max_attempts: Number of times a job is started before it is given up, e.g. because it crashed the server.
+        :param webhook_timeout: Seconds to wait for a webhook to respond.
+        :param webhook_retries: Number of times a failed webhook call is repeated.
+        :param webhook_allowed_hosts: Webhook hosts accepted even if they resolve to non-public addresses.
+        """
+        self.db = db
+        self.process = process
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_attempts = max_attempts
+        self.webhook_retries = webhook_retries
+        self.webhook_allowed_hosts = frozenset(host.lower() for host in webhook_allowed_hosts)
+        self._webhook_timeout = webhook_timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._webhooks: Set[asyncio.Task] = set()
+        self._average_duration: Optional[float] = None
+
+    async def start(self) -> None:
+        """Starts the workers and queues the jobs left unfinished by the last run."""
+        self._client = httpx.AsyncClient(timeout=self._webhook_timeout)
+        for job in await asyncio.to_thread(self.db.get_unfinished_jobs):
+            if job["attempts"] >= self.max_attempts:
+                logger.warning(f"Giving up job {job['id']} after {job['attempts']} attempts")
+                await self._finish(job["id"], error="Job was interrupted too often")
+            else:
+                self._queue.put_nowait(job["id"])
+        if self._queue.qsize():
+            logger.info(f"Resuming {self._queue.qsize()} unfinished jobs")
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Stops the workers. Running jobs stay unfinished in the database and are resumed on the next start."""
+        for task in [*self._tasks, *self._webhooks]:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._webhooks, return_exceptions=True)
+        self._tasks = []
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def submit(self, content: bytes | bytearray, content_hash: str, webhook_url: Optional[str] = None) -> Optional[str]:
+        """
+        Stores a new job and queues it.
+        :return: The id of the job, or None if it could not be stored.
+        :raises JobQueueFull: If max_queued jobs are already waiting for a worker.
+        """
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFull(self._retry_after())
+        job_id = uuid.uuid4().hex
+        if not await asyncio.to_thread(self.db.create_job, job_id, content, content_hash, webhook_url):
+            return None
+        self._queue.put_nowait(job_id)
+        return job_id
+
+    async def check_webhook_url(self, url: str) -> None:
+        """
+        Checks that a webhook URL is an http or https URL whose host resolves to public addresses only,
+        so jobs cannot make the server post to itself, its internal network or cloud metadata endpoints.
+        Hosts in webhook_allowed_hosts are accepted without resolving them.
+        :raises WebhookURLRejected: If the URL must not be posted to.
+        """
+        await self._resolve_webhook(url)
+
+    async def _resolve_webhook(self, url: str) -> Optional[str]:
+        """
+        Resolves the host of a webhook URL and checks all of its addresses.
+        :param url: The webhook URL.
+        :return: The checked address to connect to, or None for hosts in webhook_allowed_hosts.
+        :raises WebhookURLRejected: If the URL must not be posted to.
+        """
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise WebhookURLRejected("The webhook URL must be an http or https URL")
+        if parsed.hostname.lower() in self.webhook_allowed_hosts:
+            return None
+        try:
+            port = parsed.port or (443 if parsed.scheme == "https" else 80)
+            addresses = await asyncio.get_running_loop().getaddrinfo(parsed.hostname, port, type=socket.SOCK_STREAM)
+        except (OSError, ValueError):
+            raise WebhookURLRejected("The host of the webhook URL could not be resolved")
+        for *_, sockaddr in addresses:
+            address = ipaddress.ip_address(sockaddr[0])
+            if address.version == 6 and address.ipv4_mapped:
+                address = address.ipv4_mapped
+            # Loopback, private, link-local, reserved and unspecified addresses are not global
+            if not address.is_global or address.is_multicast:
+                raise WebhookURLRejected("The webhook URL must point to a public address")
+        return addresses[0][4][0]
+
+    def queued(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    def _retry_after(self) -> int:
+        """Seconds until the queued jobs have probably been started, at least one."""
+        duration = self._average_duration or 60.0
+        return max(1, math.ceil(duration * self._queue.qsize() / self.workers))
+
+    async def _work(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                # Keep the worker alive, the job stays unfinished and is retried after a restart
+                logger.error(f"Error running job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        content = await asyncio.to_thread(self.db.start_job, job_id)
+        if content is None:
+            logger.warning(f"Job {job_id} has no input image, skipping it")
+            return
+        job = await asyncio.to_thread(self.db.get_job, job_id)
+        logger.info(f"Running job {job_id}")
+        started = time.monotonic()
+        try:
+            result = await self.process(content, job["content_hash"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            await self._finish(job_id, error="Error while processing the menu")
+            return
+        finally:
+            self._record_duration(time.monotonic() - started)
+        await self._finish(job_id, result=result)
+
+    def _record_duration(self, duration: float) -> None:
+        if self._average_duration is None:
+            self._average_duration = duration
+        else:
+            self._average_duration += _SMOOTHING * (duration - self._average_duration)
+
+    async def _finish(self, job_id: str, result: Optional[List[dict]] = None, error: Optional[str] = None) -> None:
+        await asyncio.to_thread(self.db.finish_job, job_id, result, error)
+        job = await asyncio.to_thread(self.db.get_job, job_id)
+        if job is not None and job["webhook_url"]:
+            # Delivered in the background, a slow webhook must not hold up the worker
+            task = asyncio.create_task(self._notify(job))
+            self._webhooks.add(task)
+            task.add_done_callback(self._webhooks.discard)
+
+    async def _notify(self, job: Dict[str, Any]) -> None:
+        """Posts the state of a finished job to its webhook URL, retrying with backoff on failure."""
+        payload = {key: job[key] for key in ("id", "status", "result", "error", "created_at", "updated_at")}
+        for attempt in range(self.webhook_retries + 1):
+            try:
+                # Resolved again, the host may point elsewhere by now
+                address = await self._resolve_webhook(job["webhook_url"])
+            except WebhookURLRejected as e:
+                logger.warning(f"Not notifying the webhook of job {job['id']}: {e}")
+                return
+            try:
+                response = await self._post(job["webhook_url"], address, payload)
+                response.raise_for_status()
+                logger.info(f"Notified webhook of job {job['id']}")
+                return
+            except httpx.HTTPError as e:
+                logger.warning(f"Webhook of job {job['id']} failed (attempt {attempt + 1}): {type(e).__name__}")
+                if attempt < self.webhook_retries:
+                    await asyncio.sleep(2 ** attempt)
+        logger.error(f"Giving up notifying the webhook of job {job['id']}")
+
+    async def _post(self, url: str, address: Optional[str], payload: Dict[str, Any]) -> httpx.Response:
+        """
+        Posts to a webhook URL over a connection to the address that was checked for it.
+        Letting httpx resolve the host again would allow it to point somewhere else by then (DNS rebinding),
+        so only the connection goes to the address, while the Host header and the TLS server name stay the URL's.
+        :param url: The webhook URL.
+        :param address: The checked address of the host, None to connect to the host by name.
+        :param payload: The JSON body.
+        """
+        if address is None:
+            return await self._client.post(url, json=payload)
+        target = httpx.URL(url)
+        return await self._client.post(
+            target.copy_with(host=address),
+            json=payload,
+            headers={"Host": target.netloc.decode("ascii")},
+            extensions={"sni_hostname": target.host},
+        )
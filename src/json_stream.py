@@ -0,0 +1,100 @@
+"""Incremental extraction of JSON objects from a streamed JSON array."""
+
+import json
+import logging
+from typing import List, Optional
+
+from json_repair import repair_json
+
+logger = logging.getLogger("json_stream")
+
+
+class JSONObjectStreamParser:
+    """
+    Collects the top-level objects of a JSON array that arrives in chunks.
+
+    Each object is returned as soon as its closing brace has been received,
+    text around the array (e.g. markdown fences) is ignored. An object left open
+    when the stream ends, e.g. by a truncated response, is repaired by close().
+    """
+
+    def __init__(self) -> None:
+        self._buffer: str = ""
+        self._position: int = 0
+        self._stack: List[str] = []
+        self._in_string: bool = False
+        self._escaped: bool = False
+        self._object_start: int = -1
+
+    def feed(self, chunk: str) -> List[dict]:
+        """
+        Adds a chunk of the stream.
+        :param chunk: Next part of the streamed text.
+        :return: Objects completed by this chunk.
+        """
+        self._buffer += chunk
+        completed: List[dict] = []
+        buffer = self._buffer
+        for i in range(self._position, len(buffer)):
+            char = buffer[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                if self._stack:
+                    self._in_string = True
+            elif char in "[{":
+                if char == "{" and "{" not in self._stack:
+                    self._object_start = i
+                self._stack.append(char)
+            elif char in "]}" and self._stack:
+                self._stack.pop()
+                if char == "}" and self._object_start >= 0 and "{" not in self._stack:
+                    item = self._parse_object(buffer[self._object_start:i + 1])
+                    if item is not None:
+                        completed.append(item)
+                    self._object_start = -1
+        self._position = len(buffer)
+        self._compact()
+        return completed
+
+    def close(self) -> List[dict]:
+        """
+        Ends the stream.
+        :return: The object left open by a truncated stream, repaired like a complete response would be.
+        """
+        if self._object_start < 0:
+            return []
+        text = self._buffer[self._object_start:]
+        self._buffer, self._position, self._stack, self._object_start = "", 0, [], -1
+        self._in_string = self._escaped = False
+        logger.warning(f"Stream ended inside an object, repairing it: {text}")
+        item = self._parse_object(text)
+        return [item] if item is not None else []
+
+    def _compact(self) -> None:
+        # Drop text that can no longer be part of an object
+        keep_from = self._object_start if self._object_start >= 0 else self._position
+        if keep_from > 0:
+            self._buffer = self._buffer[keep_from:]
+            self._position -= keep_from
+            if self._object_start >= 0:
+                self._object_start = 0
+
+    def _parse_object(self, text: str) -> Optional[dict]:
+        try:
+            result = json.loads(text)
+        except json.JSONDecodeError:
+            try:
+                result = json.loads(repair_json(text))
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON decoding error: {e} {text}")
+                return None
+        if not isinstance(result, dict):
+            logger.error(f"Invalid JSON object received. {text}")
+            return None
+        return result
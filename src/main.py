@@ -1,10 +1,13 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from .routes import router as image_router
+from .upload_limits import UploadSizeLimitMiddleware
+from . import routes
 
 def init_logging():
     logging.basicConfig(
@@ -14,9 +17,20 @@ def init_logging():
     )
     return logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Resume background jobs left unfinished by the last run
+    await routes.job_manager.start()
+    yield
+    # Release pooled connections and worker pools on shutdown
+    await routes.job_manager.stop()
+    await routes.image_fetcher.aclose()
+    await routes.image_analyser.aclose()
+    routes.db.close()
+
 # App
 logger = init_logging()
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -24,6 +38,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Reject oversized uploads before their body is parsed, the multipart framing needs some bytes on top of the file
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_body_size=routes.settings.UPLOAD_MAX_BYTES + routes.MULTIPART_OVERHEAD,
+    paths=["/upload", "/jobs"],
+)
 
 # Importiere und füge die Routen hinzu
 app.include_router(image_router)
@@ -0,0 +1,87 @@
+"""HTML rendering of analysed menus."""
+
+from html import escape
+from typing import List, Optional
+
+# The page fragments are constants and the card template is a single f-string compiled with
+# this module, so rendering only escapes the fields and joins the parts once per page.
+# The stylesheet is served as a static, cacheable asset instead of being inlined.
+_PAGE_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Menu</title>
+    <link rel="stylesheet" href="/menu.css">
+</head>
+<body>
+    <div class="container">
+        <h1>Menu</h1>
+        <div class="menu-grid">
+"""
+
+_PAGE_TAIL = """        </div>
+    </div>
+</body>
+</html>
+"""
+
+_NO_IMAGE = """                <div class="item-image no-image">No Image Available</div>
+"""
+
+_IMAGE_FALLBACK = """                <div class="no-image" style="display:none;">No Image Available</div>
+"""
+
+_ON_IMAGE_ERROR = "this.style.display='none'; this.nextElementSibling.style.display='flex';"
+
+
+def render_menu(menu_items: List[dict]) -> str:
+    """Render the complete menu page for menu items."""
+    return "".join([_PAGE_HEAD, *(render_item(item) for item in menu_items), _PAGE_TAIL])
+
+
+def render_head() -> str:
+    """Render the start of the menu page up to the opening of the menu grid."""
+    return _PAGE_HEAD
+
+
+def render_tail() -> str:
+    """Render the end of the menu page."""
+    return _PAGE_TAIL
+
+
+def render_item(item: dict, order: Optional[int] = None) -> str:
+    """
+    Render the card of a menu item.
+    :param order: Grid position of the card, used when cards are sent out of order.
+    """
+    name = escape(str(item.get("name") or "Unknown Item"))
+    description = item.get("description")
+    price = item.get("price")
+    image_url = item.get("image_url")
+
+    style = f' style="order: {int(order)};"' if order is not None else ""
+    if image_url:
+        image = (f'                <img src="{escape(image_url)}" alt="{name}" class="item-image" '
+                 f'onerror="{_ON_IMAGE_ERROR}">\n{_IMAGE_FALLBACK}')
+    else:
+        image = _NO_IMAGE
+    description_html = (f'                    <div class="item-description">{escape(str(description))}</div>\n'
+                        if description else "")
+    price_html = f'                    <div class="item-price">{escape(str(price))}</div>\n' if price else ""
+
+    return (f'            <div class="menu-item"{style}>\n'
+            f'{image}'
+            f'                <div class="item-content">\n'
+            f'                    <div class="item-name">{name}</div>\n'
+            f'{description_html}'
+            f'{price_html}'
+            f'                </div>\n'
+            f'            </div>\n')
+
+
+def render_error(message: str) -> str:
+    """Render an error message in place of a menu item."""
+    return (f'            <div class="menu-item">\n'
+            f'                <div class="item-content">{escape(message)}</div>\n'
+            f'            </div>\n')
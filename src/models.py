@@ -4,4 +4,43 @@ from typing import Optional, List
 class ImageResponse(BaseModel):
     """Response model for the /image endpoint."""
     keyword: str
-    image_url: Optional[str]
\ No newline at end of file
+    image_url: Optional[str]
+
+
+class MenuItemResponse(BaseModel):
+    """Response model for a dish of the /upload endpoint in JSON mode."""
+    name: str
+    keyword: str
+    description: Optional[str]
+    price: str
+    image_url: Optional[str]
+
+
+class CacheStatsResponse(BaseModel):
+    """Response model for the /cache/stats endpoint."""
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+
+
+class JobResponse(BaseModel):
+    """Response model for the /jobs endpoints."""
+    id: str
+    status: str = Field(description="queued, running, done or failed")
+    result: Optional[List[MenuItemResponse]] = None
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+
+class AdmissionStatsResponse(BaseModel):
+    """Response model for the /admission/stats endpoint."""
+    running: int
+    waiting: int
+    max_concurrent: int
+    max_queued: int
+    admitted: int
+    rejected: int
+    average_wait: float = Field(description="Moving average of the seconds uploads waited for a slot")
+    average_service_time: float = Field(description="Moving average of the seconds uploads held a slot")
@@ -0,0 +1,76 @@
+"""Splitting of menu pages into tiles that are OCRed in parallel."""
+
+from typing import List, Tuple
+
+from PIL import Image
+
+from .image_preprocessing import otsu_threshold
+
+# Left, top, right, bottom in pixels
+Box = Tuple[int, int, int, int]
+
+
+def find_tiles(image: Image.Image, max_tiles: int, min_tile_height: int) -> List[Box]:
+    """
+    Splits a page into horizontal bands, top to bottom. Each cut is placed in the gap between
+    two lines of text closest to an even split, so no line is cut in half and the text of the
+    bands joined in order reads like the text of the whole page.
+    :param image: Page to split.
+    :param max_tiles: Maximum number of bands.
+    :param min_tile_height: Bands are not cut lower than this many pixels.
+    :return: Boxes of the bands.
+    """
+    height = image.height
+    bands = max(1, min(max_tiles, height // max(1, min_tile_height)))
+    if bands == 1:
+        return [(0, 0, image.width, height)]
+    ink = _row_ink(image)
+    search = height // (bands * 4)
+    cuts = [0]
+    for band in range(1, bands):
+        target = height * band // bands
+        window = range(max(cuts[-1] + 1, target - search), min(height, target + search + 1))
+        cuts.append(_best_cut(ink, window, target))
+    cuts.append(height)
+    return [(0, top, image.width, bottom) for top, bottom in zip(cuts, cuts[1:])]
+
+
+def merge_tile_texts(texts: List[str]) -> str:
+    """
+    Joins the OCR text of the tiles returned by find_tiles.
+    :param texts: OCR text of each tile, in the order of find_tiles.
+    :return: Text of the page.
+    """
+    return "\n".join(text.strip() for text in texts if text.strip())
+
+
+def _row_ink(image: Image.Image) -> bytes:
+    """Mean ink (0-255) of each pixel row. Ink is the minority of pixels, dark or light."""
+    gray = image.convert("L")
+    histogram = gray.histogram()
+    threshold = otsu_threshold(histogram)
+    if sum(histogram[:threshold + 1]) <= gray.width * gray.height / 2:
+        mask = gray.point(lambda value: 255 if value <= threshold else 0)
+    else:
+        mask = gray.point(lambda value: 255 if value > threshold else 0)
+    return mask.resize((1, gray.height), Image.Resampling.BOX).tobytes()
+
+
+def _best_cut(ink: bytes, window: range, target: int) -> int:
+    """
+    Row to cut at: the middle of the least inked run of rows in the window, usually
+    blank space between two lines. Of several such runs the one closest to the target wins.
+    """
+    lowest = min(ink[row] for row in window)
+    middles = []
+    start = None
+    for row in window:
+        if ink[row] == lowest:
+            if start is None:
+                start = row
+        elif start is not None:
+            middles.append((start + row - 1) // 2)
+            start = None
+    if start is not None:
+        middles.append((start + window.stop - 1) // 2)
+    return min(middles, key=lambda row: abs(row - target))
@@ -1,61 +1,566 @@
-from typing import List
+from typing import AsyncIterator, BinaryIO, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
 import logging
+import os
+import tempfile
 
-from fastapi import APIRouter, HTTPException, Query, UploadFile, File
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Form, Header, Response
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from PIL import UnidentifiedImageError
 
-from .models import ImageResponse
+from .models import ImageResponse, CacheStatsResponse, MenuItemResponse, JobResponse, AdmissionStatsResponse
 from .text_utils import normalize
-from .database import ImageCacheDB
-from .image_fetcher import ImageFetcher
-from .image_analyser import ImageAnalyser
+from .admission import AdmissionController, AdmissionRejected, AdmissionTicket
+from .database import CachedImageCacheDB, NO_RESULTS, FETCH_ERROR
+from .image_fetcher import AsyncImageFetcher
+from .image_analyser import ImageAnalyser, WorkerImageInput, text_signatures_match
+from .image_preprocessing import PreprocessOptions
 from .settings import Settings
+from . import menu_renderer
+from .jobs import JobManager, JobQueueFull, WebhookURLRejected
+from .single_flight import SingleFlight
+from .upload_limits import ImageTooLargeError, read_image_size
 
 router = APIRouter()
 settings = Settings()
 logger = logging.getLogger(__name__)
-db = ImageCacheDB(settings.DB_PATH)
-image_fetcher = ImageFetcher(settings.CSE_API_KEY, settings.CSE_ID)
+# Bytes read from an uploaded file at a time
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Bytes a multipart request body may have on top of the uploaded file
+MULTIPART_OVERHEAD = 64 * 1024
+# Previous uploads with a similar perceptual hash whose text signature is compared
+NEAR_DUPLICATE_CANDIDATES = 3
+db = CachedImageCacheDB(
+    settings.DB_PATH, settings.MEMORY_CACHE_SIZE, settings.MEMORY_CACHE_TTL,
+    no_results_ttl=settings.NEGATIVE_CACHE_TTL, error_ttl=settings.ERROR_CACHE_TTL,
+    upload_cache_ttl=settings.UPLOAD_CACHE_TTL, upload_cache_size=settings.UPLOAD_CACHE_SIZE,
+    parse_cache_ttl=settings.PARSE_CACHE_TTL, parse_cache_size=settings.PARSE_CACHE_SIZE,
+    job_retention=settings.JOB_RETENTION)
+image_fetcher = AsyncImageFetcher(
+    settings.CSE_API_KEY, settings.CSE_ID,
+    base_url=settings.CSE_BASE_URL,
+    timeout=settings.CSE_TIMEOUT,
+    max_connections=settings.CSE_MAX_CONNECTIONS
+)
 image_analyser = ImageAnalyser(
     ai_model=settings.AI_MODEL,
     api_key=settings.AI_API_KEY,
-    base_url=settings.AI_BASE_URL
+    base_url=settings.AI_BASE_URL,
+    ocr_workers=settings.OCR_WORKERS,
+    ai_timeout=settings.AI_TIMEOUT,
+    ai_max_retries=settings.AI_MAX_RETRIES,
+    ai_max_connections=settings.AI_MAX_CONNECTIONS,
+    preprocess=PreprocessOptions(
+        max_width=settings.OCR_MAX_WIDTH,
+        grayscale=settings.OCR_GRAYSCALE,
+        binarize=settings.OCR_BINARIZE,
+        threshold=settings.OCR_BINARIZE_THRESHOLD,
+        fix_orientation=settings.OCR_FIX_ORIENTATION
+    ) if settings.OCR_PREPROCESS else None,
+    ocr_tiles=settings.OCR_TILES or settings.OCR_WORKERS,
+    ocr_tile_min_height=settings.OCR_TILE_MIN_HEIGHT
+)
+# Limits the number of image searches in flight across all requests
+fetch_semaphore = asyncio.Semaphore(settings.IMAGE_FETCH_GLOBAL_CONCURRENCY)
+# Shares a single image search between all requests missing the same keyword
+image_search_flight: SingleFlight[Tuple[Optional[str], Optional[str]]] = SingleFlight()
+# Results of finished searches (image URL, negative cache reason) that are not in the database yet,
+# uploads write their searches back only once their analysis has ended
+unsaved_search_results: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+# Bounds the number of uploads running OCR and the AI model at the same time
+upload_admission = AdmissionController(
+    max_concurrent=settings.UPLOAD_MAX_CONCURRENCY,
+    max_queued=settings.UPLOAD_MAX_QUEUED,
+    queue_timeout=settings.UPLOAD_QUEUE_TIMEOUT
 )
 
 
-def _fetch_image_for_keyword(keyword: str) -> ImageResponse:
-    image_url = None
-    result_keyword = keyword
+def _normalize_keyword(keyword: str) -> Optional[str]:
+    """Normalize a keyword, returning None if it is not a valid search term."""
+    normalized = normalize(keyword)
+    if normalized and len(normalized) >= 2 and len(normalized) <= 100:
+        logger.info(
+            f"Searching for keyword: '{keyword}' (normalized: '{normalized}')")
+        return normalized
+    logger.warning(
+        f"Invalid keyword: '{keyword}' (normalized: '{normalized}')")
+    return None
+
+
+async def _fetch_image(normalized: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Fetch the image URL for a normalized keyword that missed the cache.
+    Returns the image URL, or the negative cache reason if no image was found.
+    """
+    try:
+        image_url = await image_fetcher.search_image_url(normalized)
+    except Exception as e:
+        logger.error(f"Error processing keyword '{normalized}': {str(e)}")
+        return None, FETCH_ERROR
+    if image_url:
+        return image_url, None
+    return None, NO_RESULTS
+
+
+async def _search_image(normalized: str, request_semaphore: asyncio.Semaphore) -> Tuple[Optional[str], Optional[str]]:
+    """Search the image of a cache miss, sharing the search with concurrent misses of the same keyword."""
+    async def search() -> Tuple[Optional[str], Optional[str]]:
+        async with request_semaphore, fetch_semaphore:
+            image_url, reason = await _fetch_image(normalized)
+        # Visible to other requests right away, before it is written to the database
+        if image_url:
+            db.memory_cache.set(normalized, image_url)
+        unsaved_search_results[normalized] = (image_url, reason)
+        return image_url, reason
+
+    return await image_search_flight.do(normalized, search)
+
+
+def _unsaved_results(keywords: List[str]) -> Dict[str, Optional[str]]:
+    """Image URLs, None for no image, of the keywords whose search result has not been saved yet"""
+    return {kw: unsaved_search_results[kw][0] for kw in keywords if kw in unsaved_search_results}
+
+
+async def _save_search_results(new_urls: Dict[str, str], new_negative_entries: Dict[str, str]) -> None:
+    """Write the results of image searches back to the cache, one transaction per table."""
     try:
-        normalized = normalize(keyword)
-        if normalized and len(normalized) >= 2 and len(normalized) <= 100:
-            result_keyword = normalized
-            logger.info(
-                f"Searching for keyword: '{keyword}' (normalized: '{normalized}')")
-            cached_url = db.get_image_url(normalized)
-            if cached_url:
-                logger.info(f"Found cached image URL for '{normalized}'")
-                image_url = cached_url
+        if new_negative_entries:
+            await asyncio.to_thread(db.save_negative_entries, new_negative_entries)
+        if new_urls:
+            if await asyncio.to_thread(db.save_image_urls, new_urls):
+                logger.info(f"Successfully cached {len(new_urls)} image URLs")
             else:
-                image_url = image_fetcher.fetch_image_url(normalized)
-                if image_url:
-                    if db.save_image_url(normalized, image_url):
-                        logger.info(
-                            f"Successfully cached image URL for '{normalized}'")
-                    else:
-                        logger.error(
-                            f"Failed to cache image URL for '{normalized}'")
-            logger.info(f"Image URL for '{normalized}': {image_url}")
+                logger.error(f"Failed to cache {len(new_urls)} image URLs")
+    finally:
+        for keyword in [*new_negative_entries, *new_urls]:
+            unsaved_search_results.pop(keyword, None)
+
+
+async def _fetch_images_for_keywords(keywords: List[str], request_semaphore: asyncio.Semaphore) -> List[ImageResponse]:
+    """Resolve image URLs for several keywords, preserving their order.
+
+    All keywords are looked up in the cache with a single query, the misses are fetched concurrently
+    and written back to the cache in a single transaction. Keywords that recently returned no image
+    are answered from the negative cache without searching again. Concurrent misses for the same
+    keyword, also across requests, share one search. request_semaphore bounds the searches of the
+    calling request.
+    """
+    normalized_keywords = [_normalize_keyword(kw) for kw in keywords]
+    valid_keywords = [kw for kw in normalized_keywords if kw]
+    image_urls = await asyncio.to_thread(db.get_image_urls, valid_keywords)
+    misses = list(dict.fromkeys(kw for kw in valid_keywords if kw not in image_urls))
+    unsaved = _unsaved_results(misses)
+    image_urls.update({kw: url for kw, url in unsaved.items() if url})
+    misses = [kw for kw in misses if kw not in unsaved]
+    if misses:
+        negative_entries = await asyncio.to_thread(db.get_negative_entries, misses)
+        misses = [kw for kw in misses if kw not in negative_entries]
+
+    fetched = await asyncio.gather(*(_search_image(kw, request_semaphore) for kw in misses))
+    new_urls = {kw: url for kw, (url, _) in zip(misses, fetched) if url}
+    new_negative_entries = {kw: reason for kw, (_, reason) in zip(misses, fetched) if reason}
+    await _save_search_results(new_urls, new_negative_entries)
+    image_urls.update(new_urls)
+
+    results = []
+    for keyword, normalized in zip(keywords, normalized_keywords):
+        image_url = image_urls.get(normalized) if normalized else None
+        logger.info(f"Image URL for '{normalized or keyword}': {image_url}")
+        results.append(ImageResponse(keyword=normalized or keyword, image_url=image_url))
+    return results
+
+
+class _UploadImageLookups:
+    """
+    Image lookups of the menu items of one upload, which may arrive one by one while the AI model
+    streams its response. Keywords requested while a cache read is running are read together in the
+    next one, so a batch of items costs one image cache and one negative cache query. Misses are
+    searched right away, their results are visible to other requests as soon as the search is done
+    and are written to the database in one transaction per table by save().
+    """
+
+    def __init__(self, request_semaphore: asyncio.Semaphore):
+        self._request_semaphore = request_semaphore
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._reader: Optional[asyncio.Task] = None
+        self._cached: Dict[str, Optional[str]] = {}
+        self._searches: Dict[str, asyncio.Task] = {}
+        self._new_urls: Dict[str, str] = {}
+        self._new_negative_entries: Dict[str, str] = {}
+
+    async def image_url(self, keyword: str) -> Optional[str]:
+        """The image URL for a keyword, None if there is none."""
+        normalized = _normalize_keyword(keyword)
+        if not normalized:
+            return None
+        if normalized in self._cached:
+            return self._cached[normalized]
+        if normalized not in self._searches:
+            cached = asyncio.get_running_loop().create_future()
+            self._pending.append((normalized, cached))
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read_pending())
+            found, image_url = await cached
+            if found:
+                return image_url
+            if normalized not in self._searches:
+                self._searches[normalized] = asyncio.create_task(self._search(normalized))
+        # Other items of the upload may wait for the same search
+        return await asyncio.shield(self._searches[normalized])
+
+    async def save(self) -> None:
+        """Write the results of the finished searches back to the cache."""
+        new_urls, self._new_urls = self._new_urls, {}
+        new_negative_entries, self._new_negative_entries = self._new_negative_entries, {}
+        await _save_search_results(new_urls, new_negative_entries)
+
+    def cancel(self) -> None:
+        """Stop the pending cache reads and searches."""
+        for task in [self._reader, *self._searches.values()]:
+            if task is not None:
+                task.cancel()
+
+    async def _read_pending(self) -> None:
+        """Answer the requested keywords from the cache, (False, None) marks a keyword to search."""
+        while self._pending:
+            pending, self._pending = self._pending, []
+            keywords = list(dict.fromkeys(kw for kw, _ in pending))
+            # Searched by another request, but not saved yet
+            unsaved = _unsaved_results(keywords)
+            try:
+                image_urls = await asyncio.to_thread(db.get_image_urls, [kw for kw in keywords if kw not in unsaved])
+                image_urls.update({kw: url for kw, url in unsaved.items() if url})
+                misses = [kw for kw in keywords if kw not in image_urls and kw not in unsaved and kw not in self._searches]
+                negative_entries = await asyncio.to_thread(db.get_negative_entries, misses) if misses else {}
+            except Exception as e:
+                for _, cached in pending:
+                    if not cached.done():
+                        cached.set_exception(e)
+                continue
+            for normalized, cached in pending:
+                if cached.done():
+                    continue
+                if normalized in image_urls or normalized in negative_entries or normalized in unsaved:
+                    self._cached[normalized] = image_urls.get(normalized)
+                    cached.set_result((True, self._cached[normalized]))
+                else:
+                    cached.set_result((False, None))
+
+    async def _search(self, normalized: str) -> Optional[str]:
+        image_url, reason = await _search_image(normalized, self._request_semaphore)
+        if image_url:
+            self._new_urls[normalized] = image_url
+        elif reason:
+            self._new_negative_entries[normalized] = reason
+        return image_url
+
+
+def _search_keyword(item: dict) -> str:
+    """Use keyword from AI response for image fetching, fallback to name if no keyword"""
+    return item.get("keyword") or item.get("name") or ""
+
+
+async def _find_near_duplicate_menu(phash: int, signature: bytes, analysis_key: str) -> Optional[List[dict]]:
+    """
+    Get the analysis of a previous upload showing the same menu, analysed with the same analysis key
+    (see ImageAnalyser.analysis_key). Uploads with a similar perceptual hash
+    are only candidates, as menus differing only in their text, e.g. in a price, have similar hashes too,
+    their text signatures must match as well.
+    """
+    candidates = await asyncio.to_thread(
+        db.find_similar_uploads, phash, analysis_key, settings.UPLOAD_PHASH_MAX_DISTANCE, NEAR_DUPLICATE_CANDIDATES)
+    for candidate_hash, candidate_signature in candidates:
+        if await asyncio.to_thread(
+                text_signatures_match, signature, candidate_signature, settings.UPLOAD_SIGNATURE_MAX_DIFFERENCE):
+            logger.info(f"Upload {candidate_hash} shows the same text")
+            return await asyncio.to_thread(db.get_upload_menu, candidate_hash)
+    return None
+
+
+async def _menu_item_batches(image_input: WorkerImageInput, content_hash: str,
+                             admission: Optional[AdmissionTicket] = None) -> AsyncIterator[List[dict]]:
+    """
+    Yield the menu items of an uploaded image as they become available. Cached analyses and
+    complete AI responses arrive as a single batch, streamed AI responses item by item.
+    Analyses are cached by the hash of the image bytes and the analysis settings (see
+    ImageAnalyser.upload_cache_key), so repeated uploads skip OCR and the AI model,
+    near-duplicates of previous uploads are recognised by their perceptual hash, and the AI parse
+    result is cached by the normalized OCR text, so different photos of the same menu skip the AI model.
+    The admission slot, if given, is released as soon as the perceptual hash, OCR and AI model are done.
+    """
+    def release_slot() -> None:
+        if admission is not None:
+            admission.release()
+
+    analysis_key = image_analyser.analysis_key()
+    upload_key = image_analyser.upload_cache_key(content_hash)
+    try:
+        cached_items = await asyncio.to_thread(db.get_upload_menu, upload_key)
+        if cached_items is not None:
+            logger.info(f"Using cached analysis for upload {content_hash}")
+            release_slot()
+            yield cached_items
+            return
+
+        fingerprint: Optional[Tuple[int, bytes]] = None
+        if settings.UPLOAD_PHASH_MAX_DISTANCE >= 0:
+            fingerprint = await image_analyser.fingerprint_async(image_input)
+            cached_items = await _find_near_duplicate_menu(*fingerprint, analysis_key)
+            if cached_items is not None:
+                # Not cached under this upload's hash, a wrong match must not outlive the original
+                logger.info(f"Using cached analysis of a near-duplicate for upload {content_hash}")
+                release_slot()
+                yield cached_items
+                return
+
+        # Extract the text directly from bytes
+        text = await image_analyser.ocr_image_async(image_input)
+        logger.info(f"Extracted text: {text}")
+
+        text_key = image_analyser.parse_cache_key(text)
+        cached_items = await asyncio.to_thread(db.get_parsed_menu, text_key)
+        if cached_items is not None:
+            logger.info(f"Using cached parse result for OCR text {text_key}")
+            release_slot()
+            yield cached_items
+            await asyncio.to_thread(db.save_upload_menu, upload_key, cached_items, fingerprint, analysis_key)
+            return
+
+        if settings.AI_STREAMING:
+            items: List[dict] = []
+            async for item in image_analyser.stream_menu_items(text):
+                items.append(item)
+                yield [item]
+            release_slot()
         else:
-            logger.warning(
-                f"Invalid keyword: '{keyword}' (normalized: '{normalized}')")
+            items = await image_analyser.parse_text_ai_async(text)
+            release_slot()
+            yield items
+    finally:
+        release_slot()
+    logger.info(f"Analysis result: {items}")
+
+    # Do not keep failed analyses
+    if items:
+        await asyncio.to_thread(db.save_parsed_menu, text_key, items)
+        await asyncio.to_thread(db.save_upload_menu, upload_key, items, fingerprint, analysis_key)
+
+
+async def _analyse_upload(image_input: WorkerImageInput, content_hash: str, request_semaphore: asyncio.Semaphore,
+                          admission: Optional[AdmissionTicket] = None) -> Tuple[List[dict], List[Optional[str]]]:
+    """
+    Analyse an uploaded image and start the image lookups of each batch of menu items
+    as soon as it is available. Returns the items and their image URLs in order.
+    The admission slot, if given, is released before the last image lookups are waited for.
+    """
+    result: List[dict] = []
+    image_lookups = _UploadImageLookups(request_semaphore)
+    lookups: List[asyncio.Task] = []
+    try:
+        async for batch in _menu_item_batches(image_input, content_hash, admission):
+            result.extend(batch)
+            lookups.extend(asyncio.create_task(image_lookups.image_url(_search_keyword(item))) for item in batch)
+        image_urls = await asyncio.gather(*lookups)
+    finally:
+        # Stop pending lookups if the analysis failed, keep what was found so far
+        for lookup in lookups:
+            lookup.cancel()
+        image_lookups.cancel()
+        await image_lookups.save()
+    return result, list(image_urls)
+
+
+def _enhance_menu_item(item: dict, image_url: Optional[str]) -> dict:
+    """Combine a parsed menu item with its image URL"""
+    logger.info(f"Added image URL for keyword '{_search_keyword(item)}' (dish: '{item.get('name')}'): {image_url}")
+    return {
+        "name": item.get("name"),
+        "description": item.get("description"),
+        "price": item.get("price"),
+        "image_url": image_url
+    }
+
+
+async def _stream_menu_html(upload_path: str, content_hash: str,
+                            admission: Optional[AdmissionTicket]) -> AsyncIterator[str]:
+    """
+    Stream the menu page: the head is sent immediately, each dish card as soon as its image URL
+    is known, cache hits right after the lookup of their batch, misses when their search is done.
+    Cards may arrive out of order, their grid position is fixed via CSS order.
+    The admission slot, if any, is released once OCR and the AI model are done, the uploaded file
+    is removed once the analysis has ended.
+    """
+    yield menu_renderer.render_head()
+    image_lookups = _UploadImageLookups(asyncio.Semaphore(settings.UPLOAD_IMAGE_FETCH_CONCURRENCY))
+    cards: asyncio.Queue = asyncio.Queue()
+
+    async def render_card(index: int, item: dict) -> None:
+        image_url = await image_lookups.image_url(_search_keyword(item))
+        await cards.put(menu_renderer.render_item(_enhance_menu_item(item, image_url), order=index))
+
+    async def analyse() -> None:
+        lookups: List[asyncio.Task] = []
+        try:
+            async for batch in _menu_item_batches(upload_path, content_hash, admission):
+                for item in batch:
+                    lookups.append(asyncio.create_task(render_card(len(lookups), item)))
+            await asyncio.gather(*lookups)
+        finally:
+            for lookup in lookups:
+                lookup.cancel()
+            image_lookups.cancel()
+            await image_lookups.save()
+            # Signals the end of the cards
+            await cards.put(None)
+
+    analysis = asyncio.create_task(analyse())
+    try:
+        while (card := await cards.get()) is not None:
+            yield card
+        await analysis
     except Exception as e:
-        logger.error(f"Error processing keyword '{keyword}': {str(e)}")
-    return ImageResponse(keyword=result_keyword, image_url=image_url)
+        # The status code has already been sent, report the error in the page
+        logger.error(f"Error streaming menu: {str(e)}")
+        yield menu_renderer.render_error("Error while processing the menu")
+    finally:
+        analysis.cancel()
+        await _finish_upload(upload_path, admission)
+    yield menu_renderer.render_tail()
+
+
+def _spool_upload(file: BinaryIO) -> Tuple[str, str, int]:
+    """
+    Copy an uploaded file chunk by chunk to a temporary file on disk, hashing it on the way, so
+    the OCR workers can read it by its path. Rejects it as soon as it exceeds UPLOAD_MAX_BYTES
+    instead of after copying all of it. Returns the path, the SHA-256 hex digest and the size.
+    """
+    content_hash = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(prefix="upload-", delete=False) as spooled:
+        try:
+            while chunk := file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > settings.UPLOAD_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail="Image file too large")
+                content_hash.update(chunk)
+                spooled.write(chunk)
+        except BaseException:
+            _remove_upload(spooled.name)
+            raise
+    return spooled.name, content_hash.hexdigest(), size
+
+
+async def _finish_upload(upload_path: str, admission: Optional[AdmissionTicket]) -> None:
+    """
+    Release the analysis slot of an upload, if it has one, and remove its file. Safe to call more than once.
+    A coroutine so that, as a background task, it runs on the event loop which owns the slot.
+    """
+    if admission is not None:
+        admission.release()
+    _remove_upload(upload_path)
+
+
+def _remove_upload(upload_path: str) -> None:
+    """Remove the temporary file of an upload, if it still exists"""
+    try:
+        os.remove(upload_path)
+    except FileNotFoundError:
+        pass
+
+
+async def _receive_upload(image: UploadFile) -> Tuple[str, str]:
+    """
+    Validate an uploaded image and copy it to a temporary file. Raises HTTPException if it is not
+    an image or exceeds the size limits. Returns the path of the file and its SHA-256 hex digest,
+    the caller removes the file with _remove_upload.
+    """
+    # Log information about the uploaded file
+    logger.info(f"File uploaded: {image.filename}")
+    logger.info(f"Content-Type: {image.content_type}")
+    logger.info(
+        f"File size: {image.size if hasattr(image, 'size') else 'Unknown'} Bytes")
+
+    # Validate the content type
+    if not image.content_type or not image.content_type.startswith('image/'):
+        logger.warning(f"Invalid content type: {image.content_type}")
+        raise HTTPException(
+            status_code=400, detail="Only image files are allowed")
+
+    if image.size is not None and image.size > settings.UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Image file too large")
+
+    # Check the dimensions from the image header before reading the whole file
+    try:
+        width, height = await asyncio.to_thread(
+            read_image_size, image.file, settings.UPLOAD_MAX_PIXELS, settings.UPLOAD_MAX_SIDE)
+    except UnidentifiedImageError:
+        logger.warning(f"Upload is not a readable image: {image.filename}")
+        raise HTTPException(status_code=400, detail="The file is not a readable image")
+    except ImageTooLargeError as e:
+        logger.warning(f"Rejected upload {image.filename}: {e}")
+        raise HTTPException(status_code=413, detail="Image dimensions too large")
+    logger.info(f"Image dimensions: {width}x{height}")
+
+    # Copy the file content
+    upload_path, content_hash, actual_size = await asyncio.to_thread(_spool_upload, image.file)
+    # The spooled copy of the upload is not needed anymore
+    await image.close()
+    logger.info(f"Actual file size: {actual_size} Bytes")
+    return upload_path, content_hash
+
+
+async def _admit_upload() -> AdmissionTicket:
+    """Wait for a free analysis slot. Raises HTTPException with Retry-After if the server is too busy"""
+    try:
+        admission = await upload_admission.admit()
+    except AdmissionRejected as e:
+        logger.warning(f"Upload rejected with {e.status_code}: {upload_admission.stats()}")
+        raise HTTPException(status_code=e.status_code, detail=e.detail,
+                            headers={"Retry-After": str(e.retry_after)})
+    if admission.wait > 0.1:
+        logger.info(f"Upload waited {admission.wait:.2f}s for an analysis slot")
+    return admission
+
+
+def _queue_wait_headers(admission: Optional[AdmissionTicket]) -> dict:
+    """Exposes the time an upload waited for an analysis slot, if it needed one"""
+    if admission is None:
+        return {}
+    return {"Server-Timing": f"queue;dur={admission.wait * 1000:.1f}"}
+
+
+def _menu_item_responses(result: List[dict], image_urls: List[Optional[str]]) -> List[MenuItemResponse]:
+    """Combine parsed menu items with their image URLs for JSON responses"""
+    return [MenuItemResponse(
+        name=item["name"],
+        keyword=_search_keyword(item),
+        description=item.get("description"),
+        price=item["price"],
+        image_url=image_url
+    ) for item, image_url in zip(result, image_urls)]
+
+
+async def _process_job(content: bytes, content_hash: str) -> List[dict]:
+    """Analyse the image of a background job, the result has the form of /upload in JSON mode"""
+    result, image_urls = await _analyse_upload(
+        content, content_hash, asyncio.Semaphore(settings.UPLOAD_IMAGE_FETCH_CONCURRENCY))
+    return [response.model_dump() for response in _menu_item_responses(result, image_urls)]
+
+
+job_manager = JobManager(
+    db, _process_job,
+    workers=settings.JOB_WORKERS,
+    max_queued=settings.JOB_MAX_QUEUED,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    webhook_timeout=settings.JOB_WEBHOOK_TIMEOUT,
+    webhook_allowed_hosts=settings.JOB_WEBHOOK_ALLOWED_HOSTS
+)
 
 
 @router.get("/images", response_model=List[ImageResponse])
-def get_multiple_images(keyword: List[str] = Query(..., description="List of keywords to search for")):
+async def get_multiple_images(keyword: List[str] = Query(..., description="List of keywords to search for")):
     if not keyword:
         raise HTTPException(
             status_code=422, detail="At least one keyword must be provided.")
@@ -64,7 +569,8 @@ def get_multiple_images(keyword: List[str] = Query(..., description="List of key
             status_code=422, detail="Too many keywords provided. Maximum 50 keywords allowed.")
     try:
         normalized_keywords = [normalize(kw) for kw in keyword]
-        results = [_fetch_image_for_keyword(kw) for kw in normalized_keywords]
+        results = await _fetch_images_for_keywords(
+            normalized_keywords, asyncio.Semaphore(settings.IMAGE_FETCH_CONCURRENCY))
         return results
     except Exception as e:
         logger.error(f"Unexpected error in get_multiple_images: {str(e)}")
@@ -72,62 +578,68 @@ def get_multiple_images(keyword: List[str] = Query(..., description="List of key
             status_code=500, detail="Internal server error occurred while processing keywords.")
 
 
-@router.post("/upload")
-async def upload_file(image: UploadFile = File(...)):
+@router.get("/cache/stats", response_model=CacheStatsResponse)
+def get_cache_stats():
+    """Hit/miss counters of the in-memory image URL cache."""
+    return CacheStatsResponse(**db.memory_cache.stats())
+
+
+def _wants_json(accept: Optional[str]) -> bool:
+    """Whether the client asked for JSON instead of the HTML menu page"""
+    return bool(accept) and "application/json" in accept and "text/html" not in accept
+
+
+@router.get("/admission/stats", response_model=AdmissionStatsResponse)
+def get_admission_stats():
+    """Running and waiting uploads and counters of admitted and rejected uploads."""
+    return AdmissionStatsResponse(**upload_admission.stats())
+
+
+@router.post("/upload", responses={200: {
+    "model": List[MenuItemResponse],
+    "content": {"text/html": {}},
+    "description": "The menu page, or the dishes as JSON if requested with 'Accept: application/json'"}})
+async def upload_file(response: Response, image: UploadFile = File(...),
+                      stream: bool = Query(False, description="Stream the menu page while dishes are resolved"),
+                      accept: Optional[str] = Header(None)):
     """Route for uploading images"""
     try:
-        # Log information about the uploaded file
-        logger.info(f"File uploaded: {image.filename}")
-        logger.info(f"Content-Type: {image.content_type}")
-        logger.info(
-            f"File size: {image.size if hasattr(image, 'size') else 'Unknown'} Bytes")
-
-        # Validate the content type
-        if not image.content_type or not image.content_type.startswith('image/'):
-            logger.warning(f"Invalid content type: {image.content_type}")
-            raise HTTPException(
-                status_code=400, detail="Only image files are allowed")
-
-        # Read the file content
-        content = await image.read()
-        actual_size = len(content)
-        logger.info(f"Actual file size: {actual_size} Bytes")
-
-        # Analyze the image directly from bytes
-        result = image_analyser.analyse_image(content)
-        logger.info(f"Analysis result: {result}")
-
-
-        # Fetch image URLs for each menu item
-        enhanced_result = []
-        for item in result:
-            # Use keyword from AI response for image fetching, fallback to name if no keyword
-            search_keyword = item.get("keyword", item.get("name", ""))
-            if search_keyword:
-                # Fetch image URL using the keyword from AI response
-                image_response = _fetch_image_for_keyword(search_keyword)
-                # Create enhanced item with image URL
-                enhanced_item = {
-                    "name": item.get("name"),
-                    "description": item.get("description"),
-                    "price": item.get("price"),
-                    "image_url": image_response.image_url
-                }
-                enhanced_result.append(enhanced_item)
-                logger.info(f"Added image URL for keyword '{search_keyword}' (dish: '{item.get('name')}'): {image_response.image_url}")
-            else:
-                # If no keyword or name, add item without image URL
-                enhanced_item = {
-                    "name": item.get("name"),
-                    "description": item.get("description"),
-                    "price": item.get("price"),
-                    "image_url": None
-                }
-                enhanced_result.append(enhanced_item)
+        upload_path, content_hash = await _receive_upload(image)
+        streamed = False
+        admission: Optional[AdmissionTicket] = None
+        try:
+            # Repeated uploads are answered from the cache without an analysis slot, otherwise
+            # wait for a free slot, or turn the upload away if too many are waiting
+            if await asyncio.to_thread(db.get_upload_menu, image_analyser.upload_cache_key(content_hash)) is None:
+                admission = await _admit_upload()
+
+            as_json = _wants_json(accept)
+            if stream and not as_json:
+                streamed = True
+                return StreamingResponse(
+                    _stream_menu_html(upload_path, content_hash, admission), media_type="text/html",
+                    # Keep reverse proxies from buffering the streamed page
+                    headers={"X-Accel-Buffering": "no", **_queue_wait_headers(admission)},
+                    # Also runs when the client disconnects before the generator was started
+                    background=BackgroundTask(_finish_upload, upload_path, admission))
+
+            # Analyse the menu and fetch image URLs for all menu items concurrently
+            result, image_urls = await _analyse_upload(
+                upload_path, content_hash, asyncio.Semaphore(settings.UPLOAD_IMAGE_FETCH_CONCURRENCY), admission)
+        finally:
+            # A streamed page releases the slot and removes the file itself once it has been analysed
+            if not streamed:
+                await _finish_upload(upload_path, admission)
+
+        if as_json:
+            response.headers.update(_queue_wait_headers(admission))
+            return _menu_item_responses(result, image_urls)
+
+        enhanced_result = [_enhance_menu_item(item, image_url) for item, image_url in zip(result, image_urls)]
 
         # Generate HTML for the menu items
-        html_content = _generate_menu_html(enhanced_result)
-        return HTMLResponse(content=html_content, status_code=200)
+        html_content = menu_renderer.render_menu(enhanced_result)
+        return HTMLResponse(content=html_content, status_code=200, headers=_queue_wait_headers(admission))
 
     except HTTPException:
         # Re-raise HTTP exceptions
@@ -138,138 +650,42 @@ async def upload_file(image: UploadFile = File(...)):
             status_code=500, detail="Internal server error while uploading the file")
 
 
-def _generate_menu_html(menu_items: List[dict]) -> str:
-    """Generate HTML page for menu items"""
-    html = """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Menu</title>
-        <style>
-            body {
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                margin: 0;
-                padding: 20px;
-                background-color: #f5f5f5;
-                color: #333;
-            }
-            .container {
-                max-width: 1200px;
-                margin: 0 auto;
-            }
-            h1 {
-                text-align: center;
-                color: #2c3e50;
-                margin-bottom: 30px;
-                font-size: 2.5em;
-            }
-            .menu-grid {
-                display: grid;
-                grid-template-columns: repeat(auto-fit, minmax(350px, 1fr));
-                gap: 20px;
-                padding: 20px 0;
-            }
-            .menu-item {
-                background: white;
-                border-radius: 12px;
-                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-                overflow: hidden;
-                transition: transform 0.3s ease, box-shadow 0.3s ease;
-            }
-            .menu-item:hover {
-                transform: translateY(-5px);
-                box-shadow: 0 8px 15px rgba(0, 0, 0, 0.2);
-            }
-            .item-image {
-                width: 100%;
-                height: 200px;
-                object-fit: cover;
-                background-color: #e9ecef;
-            }
-            .item-content {
-                padding: 20px;
-            }
-            .item-name {
-                font-size: 1.4em;
-                font-weight: bold;
-                color: #2c3e50;
-                margin-bottom: 10px;
-            }
-            .item-description {
-                color: #666;
-                line-height: 1.5;
-                margin-bottom: 15px;
-                font-size: 0.95em;
-            }
-            .item-price {
-                font-size: 1.3em;
-                font-weight: bold;
-                color: #e74c3c;
-                text-align: right;
-            }
-            .no-image {
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                background-color: #ecf0f1;
-                color: #95a5a6;
-                font-size: 0.9em;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>Menu</h1>
-            <div class="menu-grid">
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+async def submit_job(response: Response, image: UploadFile = File(...),
+                     webhook_url: Optional[str] = Form(None, description="URL the finished job is posted to")):
     """
-    
-    for item in menu_items:
-        name = item.get("name", "Unknown Item")
-        description = item.get("description", "")
-        price = item.get("price", "")
-        image_url = item.get("image_url")
-        
-        html += f"""
-                <div class="menu-item">
-        """
-        
-        if image_url:
-            html += f"""
-                    <img src="{image_url}" alt="{name}" class="item-image" onerror="this.style.display='none'; this.nextElementSibling.style.display='flex';">
-                    <div class="no-image" style="display:none;">No Image Available</div>
-            """
-        else:
-            html += """
-                    <div class="item-image no-image">No Image Available</div>
-            """
-        
-        html += f"""
-                    <div class="item-content">
-                        <div class="item-name">{name}</div>
-        """
-        
-        if description:
-            html += f"""
-                        <div class="item-description">{description}</div>
-            """
-        
-        if price:
-            html += f"""
-                        <div class="item-price">{price}</div>
-            """
-        
-        html += """
-                    </div>
-                </div>
-        """
-    
-    html += """
-            </div>
-        </div>
-    </body>
-    </html>
+    Queue a menu image for analysis in the background. Poll the returned job
+    via GET /jobs/{job_id}, or receive it at the webhook URL once it is finished.
     """
-    
-    return html
+    if webhook_url:
+        try:
+            await job_manager.check_webhook_url(webhook_url)
+        except WebhookURLRejected as e:
+            logger.warning(f"Rejected webhook URL {webhook_url}: {e}")
+            raise HTTPException(status_code=400, detail=str(e))
+    upload_path, content_hash = await _receive_upload(image)
+    try:
+        # Jobs keep their input image in the database, to be resumed after a restart
+        with open(upload_path, "rb") as file:
+            content = await asyncio.to_thread(file.read)
+    finally:
+        _remove_upload(upload_path)
+    try:
+        job_id = await job_manager.submit(content, content_hash, webhook_url or None)
+    except JobQueueFull as e:
+        logger.warning(f"Job rejected, {job_manager.queued()} jobs are queued")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    if job_id is None:
+        raise HTTPException(status_code=500, detail="Internal server error while queueing the job")
+    job = await asyncio.to_thread(db.get_job, job_id)
+    response.headers["Location"] = f"/jobs/{job_id}"
+    return JobResponse(**job)
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """State of a background job, with the dishes once it is done"""
+    job = await asyncio.to_thread(db.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobResponse(**job)
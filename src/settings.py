@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -5,10 +7,88 @@ class Settings(BaseSettings):
     DB_PATH: str = Field(default="cache.db")
     CSE_API_KEY: str = Field(default="")
     CSE_ID: str = Field(default="")
+    CSE_BASE_URL: str = Field(default="https://www.googleapis.com/customsearch/v1")
+    # Seconds to wait for the image search API
+    CSE_TIMEOUT: float = Field(default=10.0, gt=0)
+    # Maximum number of pooled connections to the image search API
+    CSE_MAX_CONNECTIONS: int = Field(default=100, ge=1)
     AI_MODEL: str = Field(default="")
     AI_API_KEY: str = Field(default="")
     AI_BASE_URL: str = Field(default="")
-
+    # Number of worker processes running OCR
+    OCR_WORKERS: int = Field(default=2, ge=1)
+    # Preprocess images before OCR, the OCR_* options below have no effect if disabled
+    OCR_PREPROCESS: bool = Field(default=True)
+    # Downscale images wider than this many pixels before OCR, 0 keeps the original size
+    OCR_MAX_WIDTH: int = Field(default=2000, ge=0)
+    OCR_GRAYSCALE: bool = Field(default=True)
+    OCR_BINARIZE: bool = Field(default=False)
+    # Brightness threshold for binarization, 0 chooses it per image
+    OCR_BINARIZE_THRESHOLD: int = Field(default=0, ge=0, le=255)
+    # Rotate images according to their EXIF orientation before OCR
+    OCR_FIX_ORIENTATION: bool = Field(default=True)
+    # Maximum number of horizontal bands a page is split into to OCR them in parallel, 0 uses OCR_WORKERS, 1 disables tiling
+    OCR_TILES: int = Field(default=0, ge=0)
+    # Minimum height in pixels of a band
+    OCR_TILE_MIN_HEIGHT: int = Field(default=300, ge=1)
+    # Stream the AI response and look up dish images while the model is still generating
+    AI_STREAMING: bool = Field(default=True)
+    # Seconds to wait for the AI model
+    AI_TIMEOUT: float = Field(default=60.0, gt=0)
+    # Number of retries of failed AI requests
+    AI_MAX_RETRIES: int = Field(default=2, ge=0)
+    # Maximum number of concurrent connections to the AI model
+    AI_MAX_CONNECTIONS: int = Field(default=20, ge=1)
+    # Maximum number of concurrent image searches for a single request
+    IMAGE_FETCH_CONCURRENCY: int = Field(default=8, ge=1)
+    # Maximum number of concurrent image searches for the dishes of a single upload
+    UPLOAD_IMAGE_FETCH_CONCURRENCY: int = Field(default=8, ge=1)
+    # Maximum number of concurrent image searches across all requests
+    IMAGE_FETCH_GLOBAL_CONCURRENCY: int = Field(default=16, ge=1)
+    # Number of image URLs kept in memory in front of the database, 0 disables the memory cache
+    MEMORY_CACHE_SIZE: int = Field(default=1024, ge=0)
+    # Seconds an image URL stays in the memory cache
+    MEMORY_CACHE_TTL: float = Field(default=3600, gt=0)
+    # Seconds a keyword without image results is not searched again
+    NEGATIVE_CACHE_TTL: float = Field(default=86400, ge=0)
+    # Seconds a keyword whose search failed is not searched again
+    ERROR_CACHE_TTL: float = Field(default=300, ge=0)
+    # Maximum size in bytes of an uploaded image
+    UPLOAD_MAX_BYTES: int = Field(default=20 * 1024 * 1024, ge=1)
+    # Maximum number of pixels of an uploaded image, checked from its header before decoding
+    UPLOAD_MAX_PIXELS: int = Field(default=60_000_000, ge=1)
+    # Maximum width and height in pixels of an uploaded image
+    UPLOAD_MAX_SIDE: int = Field(default=16000, ge=1)
+    # Seconds the analysis of an uploaded image is reused for identical uploads
+    UPLOAD_CACHE_TTL: float = Field(default=604800, ge=0)
+    # Maximum number of cached upload analyses
+    UPLOAD_CACHE_SIZE: int = Field(default=1000, ge=0)
+    # Maximum Hamming distance between perceptual hashes of near-duplicate uploads, -1 disables the lookup
+    UPLOAD_PHASH_MAX_DISTANCE: int = Field(default=-1, ge=-1, le=256)
+    # Number of pixels in each band of the text signatures of near-duplicate uploads that may differ
+    UPLOAD_SIGNATURE_MAX_DIFFERENCE: int = Field(default=6, ge=0)
+    # Seconds the AI parse result of an OCR text is reused for the same text
+    PARSE_CACHE_TTL: float = Field(default=2592000, ge=0)
+    # Maximum number of cached AI parse results
+    PARSE_CACHE_SIZE: int = Field(default=5000, ge=0)
+    # Number of uploads running OCR and the AI model at the same time
+    UPLOAD_MAX_CONCURRENCY: int = Field(default=4, ge=1)
+    # Number of uploads waiting for a slot, further uploads are rejected with 429
+    UPLOAD_MAX_QUEUED: int = Field(default=16, ge=0)
+    # Seconds an upload waits for a slot before it is rejected with 503
+    UPLOAD_QUEUE_TIMEOUT: float = Field(default=30.0, gt=0)
+    # Number of background jobs processed at the same time
+    JOB_WORKERS: int = Field(default=2, ge=1)
+    # Number of times a job is started before it is given up, e.g. because it was interrupted by restarts
+    JOB_MAX_ATTEMPTS: int = Field(default=3, ge=1)
+    # Number of jobs waiting for a worker, further jobs are rejected with 429
+    JOB_MAX_QUEUED: int = Field(default=100, ge=0)
+    # Seconds finished jobs are kept
+    JOB_RETENTION: float = Field(default=604800, ge=0)
+    # Seconds to wait for a job webhook to respond
+    JOB_WEBHOOK_TIMEOUT: float = Field(default=10.0, gt=0)
+    # Webhook hosts allowed even if they resolve to loopback or private addresses, as a JSON list
+    JOB_WEBHOOK_ALLOWED_HOSTS: List[str] = Field(default=[])
 
     class Config:
         env_file = ".env"
\ No newline at end of file
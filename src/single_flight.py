@@ -0,0 +1,30 @@
+"""Deduplication of concurrent calls for the same key."""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Runs at most one call per key at a time. Callers asking for a key that is
+    already in flight wait for the running call and share its result.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, "asyncio.Task[T]"] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn for key, or join the call for key that is already running."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        # Shield the shared call so a cancelled caller does not cancel it for all others
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        """Number of calls currently running."""
+        return len(self._calls)
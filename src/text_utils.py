@@ -26,6 +26,15 @@ def normalize(keyword: str) -> str:
     return keyword
 
 
+
+def normalize_ocr_text(text: str) -> str:
+    """
+    Normalizes OCR output so that texts differing only in whitespace are equal:
+    strips lines, reduces whitespace runs to a single space and drops empty lines.
+    """
+    lines = (re.sub(r'\s+', ' ', line).strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)
+
 if __name__ == "__main__":
     normalized = normalize("寿司")
     print(normalized)
@@ -0,0 +1,104 @@
+"""Limits on the size of uploaded images, checked before an upload is buffered or decoded."""
+
+import logging
+from typing import BinaryIO, Iterable, Tuple
+
+from PIL import Image
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class ImageTooLargeError(Exception):
+    """Raised when an image has more pixels than allowed."""
+
+
+def read_image_size(file: BinaryIO, max_pixels: int, max_side: int) -> Tuple[int, int]:
+    """
+    Reads the dimensions of an image from its header without decoding the pixels.
+    The file position is restored afterwards.
+    :param file: Binary file containing the encoded image.
+    :param max_pixels: Maximum number of pixels (width * height).
+    :param max_side: Maximum width and height in pixels.
+    :return: Width and height of the image.
+    :raises PIL.UnidentifiedImageError: If the file is not an image Pillow can decode.
+    :raises ImageTooLargeError: If the image exceeds one of the limits.
+    """
+    position = file.tell()
+    try:
+        with Image.open(file) as image:
+            width, height = image.size
+    except Image.DecompressionBombError as e:
+        raise ImageTooLargeError(str(e)) from e
+    finally:
+        file.seek(position)
+    if width * height > max_pixels or max(width, height) > max_side:
+        raise ImageTooLargeError(f"Image of {width}x{height} pixels exceeds the limits")
+    return width, height
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects request bodies larger than max_body_size with 413 on the given paths, before the
+    body is parsed: by the Content-Length header if present, otherwise as soon as more bytes
+    than allowed have been received, without reading the rest.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int, paths: Iterable[str]):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_body_size:
+                logger.warning(f"Rejected request body of {int(value)} bytes to {scope['path']}")
+                await self._reject(scope, receive, send)
+                return
+
+        received = 0
+        too_large = False
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, too_large
+            if too_large:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # Ends parsing of the body, the response is replaced by 413 in limited_send
+                    too_large = True
+                    logger.warning(f"Rejected request body of more than {self.max_body_size} bytes to {scope['path']}")
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def limited_send(message: Message) -> None:
+            nonlocal response_started
+            if too_large and not response_started:
+                raise _BodyTooLarge()
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, limited_send)
+        except Exception:
+            if not too_large or response_started:
+                raise
+        if too_large and not response_started:
+            await self._reject(scope, receive, send)
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send) -> None:
+        response = JSONResponse({"detail": "Request body too large"}, status_code=413)
+        await response(scope, receive, send)
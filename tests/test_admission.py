@@ -0,0 +1,173 @@
+import asyncio
+
+import pytest
+
+from src.admission import AdmissionController, AdmissionRejected
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_admits_up_to_max_concurrent_without_waiting():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=2, max_queued=0, queue_timeout=1.0)
+        first = await controller.admit()
+        second = await controller.admit()
+        assert controller.stats()["running"] == 2
+        first.release()
+        second.release()
+        return controller.stats(), first.wait
+
+    stats, wait = run(scenario())
+    assert stats["running"] == 0
+    assert stats["admitted"] == 2
+    assert wait < 0.1
+
+
+def test_rejects_with_429_when_queue_is_full():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queued=1, queue_timeout=10.0)
+        ticket = await controller.admit()
+        waiter = asyncio.create_task(controller.admit())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.admit()
+        ticket.release()
+        (await waiter).release()
+        return rejected.value, controller.stats()
+
+    rejected, stats = run(scenario())
+    assert rejected.status_code == 429
+    assert stats["rejected"] == 1
+    assert stats["admitted"] == 2
+
+
+def test_rejects_with_503_after_queue_timeout():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queued=5, queue_timeout=0.05)
+        ticket = await controller.admit()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.admit()
+        stats = controller.stats()
+        ticket.release()
+        return rejected.value, stats
+
+    rejected, stats = run(scenario())
+    assert rejected.status_code == 503
+    assert stats["waiting"] == 0
+    assert stats["rejected"] == 1
+
+
+def test_retry_after_without_service_time_uses_queue_timeout():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=2, max_queued=0, queue_timeout=10.0)
+        tickets = [await controller.admit(), await controller.admit()]
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.admit()
+        for ticket in tickets:
+            ticket.release()
+        return rejected.value
+
+    # The one request that would wait is served once one of two slots frees up
+    assert run(scenario()).retry_after == 5
+
+
+def test_retry_after_is_at_least_one_second():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queued=0, queue_timeout=10.0)
+        # A fast request sets the service time estimate far below a second
+        (await controller.admit()).release()
+        ticket = await controller.admit()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.admit()
+        ticket.release()
+        return rejected.value
+
+    assert run(scenario()).retry_after == 1
+
+
+def test_waiting_request_is_admitted_in_order_on_release():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queued=2, queue_timeout=10.0)
+        ticket = await controller.admit()
+        order = []
+
+        async def wait_for_slot(name):
+            admitted = await controller.admit()
+            order.append(name)
+            admitted.release()
+
+        waiters = [asyncio.create_task(wait_for_slot(name)) for name in ("first", "second")]
+        await asyncio.sleep(0)
+        assert controller.stats()["waiting"] == 2
+        ticket.release()
+        await asyncio.gather(*waiters)
+        return order, controller.stats()
+
+    order, stats = run(scenario())
+    assert order == ["first", "second"]
+    assert stats["running"] == 0
+    assert stats["waiting"] == 0
+
+
+def test_release_is_idempotent():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queued=0, queue_timeout=10.0)
+        ticket = await controller.admit()
+        ticket.release()
+        ticket.release()
+        assert controller.stats()["running"] == 0
+        # A second release must not have freed an extra slot
+        other = await controller.admit()
+        with pytest.raises(AdmissionRejected):
+            await controller.admit()
+        other.release()
+
+    run(scenario())
+
+
+def test_async_with_releases_once_after_explicit_release():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queued=0, queue_timeout=10.0)
+        async with await controller.admit() as ticket:
+            ticket.release()
+        assert controller.stats()["running"] == 0
+        async with await controller.admit():
+            assert controller.stats()["running"] == 1
+            with pytest.raises(AdmissionRejected):
+                await controller.admit()
+        return controller.stats()
+
+    stats = run(scenario())
+    assert stats["running"] == 0
+    assert stats["admitted"] == 2
+
+
+def test_async_with_releases_on_error():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queued=0, queue_timeout=10.0)
+        with pytest.raises(RuntimeError):
+            async with await controller.admit():
+                raise RuntimeError("analysis failed")
+        return controller.stats()
+
+    assert run(scenario())["running"] == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queued=1, queue_timeout=10.0)
+        ticket = await controller.admit()
+        waiter = asyncio.create_task(controller.admit())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        stats = controller.stats()
+        ticket.release()
+        # The slot of the cancelled waiter is free for the next request
+        (await controller.admit()).release()
+        return stats
+
+    assert run(scenario())["waiting"] == 0
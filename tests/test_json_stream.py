@@ -0,0 +1,119 @@
+import json
+
+from src.json_stream import JSONObjectStreamParser
+
+ITEMS = [
+    {"name": "Grilled Chicken Caesar Salad", "keyword": "chicken caesar salad", "description": "null", "price": "$12.99"},
+    {"name": "Crème brûlée", "keyword": "creme brulee", "description": "null", "price": "5.00"},
+]
+
+
+def feed_all(parser, chunks):
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    return items
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_objects_split_across_chunks():
+    text = json.dumps(ITEMS, ensure_ascii=False)
+    for size in (1, 3, 7, len(text)):
+        parser = JSONObjectStreamParser()
+        assert feed_all(parser, chunked(text, size)) == ITEMS
+        assert parser.close() == []
+
+
+def test_object_is_returned_as_soon_as_it_is_closed():
+    parser = JSONObjectStreamParser()
+    assert parser.feed('[{"name": "Soup"') == []
+    assert parser.feed('}, {"name"') == [{"name": "Soup"}]
+    assert parser.feed(': "Bread"}]') == [{"name": "Bread"}]
+
+
+def test_braces_and_brackets_inside_strings():
+    items = [{"name": "Curly {fries} [large]", "description": "ends with {"}, {"name": "}]"}]
+    parser = JSONObjectStreamParser()
+    assert feed_all(parser, chunked(json.dumps(items), 2)) == items
+
+
+def test_escaped_quotes_and_backslashes():
+    items = [
+        {"name": 'The "Big" one', "description": "say \\\"hi\\\" {"},
+        {"name": "path\\", "price": "1"},
+    ]
+    text = json.dumps(items)
+    for size in (1, 2, 5):
+        parser = JSONObjectStreamParser()
+        assert feed_all(parser, chunked(text, size)) == items
+
+
+def test_escaped_quote_followed_by_brace():
+    items = [{"name": 'a" {', "price": "1"}, {"name": "b"}]
+    parser = JSONObjectStreamParser()
+    assert feed_all(parser, chunked(json.dumps(items), 1)) == items
+
+
+def test_unicode_escapes():
+    parser = JSONObjectStreamParser()
+    assert feed_all(parser, chunked('[{"name": "Cr\\u00e8me \\"br\\u00fbl\\u00e9e\\""}]', 4)) == [
+        {"name": 'Crème "brûlée"'}]
+
+
+def test_nested_objects_and_arrays_are_one_item():
+    items = [{"name": "Platter", "sides": [{"name": "Fries"}, {"name": "Salad"}], "tags": [["a"], []]}]
+    parser = JSONObjectStreamParser()
+    assert feed_all(parser, chunked(json.dumps(items), 3)) == items
+
+
+def test_text_around_the_array_is_ignored():
+    text = 'Here you go:\n```json\n' + json.dumps(ITEMS, ensure_ascii=False) + '\n```\nEnjoy {not json}'
+    parser = JSONObjectStreamParser()
+    assert feed_all(parser, chunked(text, 5)) == ITEMS
+
+
+def test_values_that_are_not_objects_are_skipped():
+    parser = JSONObjectStreamParser()
+    assert feed_all(parser, ['[1, "two", null, {"name": "Soup"}, [3]]']) == [{"name": "Soup"}]
+
+
+def test_malformed_object_is_repaired():
+    parser = JSONObjectStreamParser()
+    assert parser.feed("[{'name': 'Soup', 'price': '4.50',}]") == [{"name": "Soup", "price": "4.50"}]
+
+
+def test_close_repairs_truncated_object():
+    parser = JSONObjectStreamParser()
+    assert feed_all(parser, ['[{"name": "Soup"}, {"name": "Bre', 'ad", "price": "2']) == [{"name": "Soup"}]
+    assert parser.close() == [{"name": "Bread", "price": "2"}]
+
+
+def test_close_repairs_truncated_string_with_escape():
+    parser = JSONObjectStreamParser()
+    assert parser.feed('[{"name": "The \\"Big') == []
+    assert parser.close() == [{"name": 'The "Big'}]
+
+
+def test_close_without_open_object():
+    parser = JSONObjectStreamParser()
+    assert parser.close() == []
+    parser.feed('[{"name": "Soup"}')
+    assert parser.close() == []
+
+
+def test_close_resets_the_parser():
+    parser = JSONObjectStreamParser()
+    parser.feed('[{"name": "Soup", "tags": ["hot')
+    parser.close()
+    assert parser.feed('[{"name": "Bread"}]') == [{"name": "Bread"}]
+
+
+def test_buffer_does_not_keep_completed_objects():
+    parser = JSONObjectStreamParser()
+    for _ in range(100):
+        parser.feed(json.dumps(ITEMS[0]) + ", ")
+    parser.feed('{"name": "Open')
+    assert len(parser._buffer) == len('{"name": "Open')
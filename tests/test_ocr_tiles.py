@@ -0,0 +1,90 @@
+from PIL import Image, ImageDraw
+
+from src.ocr_tiles import find_tiles, merge_tile_texts
+
+WIDTH = 600
+HEIGHT = 1200
+LINE_HEIGHT = 20
+LINE_SPACING = 50
+
+
+def page(background="white", ink="black", line_tops=None, line_width=WIDTH - 80):
+    """Page with a bar of ink for each line of text."""
+    image = Image.new("RGB", (WIDTH, HEIGHT), background)
+    draw = ImageDraw.Draw(image)
+    if line_tops is None:
+        line_tops = range(10, HEIGHT - LINE_HEIGHT, LINE_SPACING)
+    for top in line_tops:
+        draw.rectangle((40, top, 40 + line_width - 1, top + LINE_HEIGHT - 1), fill=ink)
+    return image, list(line_tops)
+
+
+def cuts(tiles):
+    return [top for _, top, _, _ in tiles[1:]]
+
+
+def assert_covers_page(tiles, image):
+    assert tiles[0][1] == 0
+    assert tiles[-1][3] == image.height
+    for (_, _, _, bottom), (_, top, _, _) in zip(tiles, tiles[1:]):
+        assert bottom == top
+    assert all(left == 0 and right == image.width for left, _, right, _ in tiles)
+
+
+def assert_between_lines(cut, line_tops):
+    assert not any(top <= cut < top + LINE_HEIGHT for top in line_tops)
+
+
+def test_single_tile_when_tiling_is_disabled():
+    image, _ = page()
+    assert find_tiles(image, max_tiles=1, min_tile_height=100) == [(0, 0, WIDTH, HEIGHT)]
+
+
+def test_cuts_are_placed_between_lines_near_an_even_split():
+    image, line_tops = page()
+    tiles = find_tiles(image, max_tiles=3, min_tile_height=100)
+    assert len(tiles) == 3
+    assert_covers_page(tiles, image)
+    for cut, target in zip(cuts(tiles), (400, 800)):
+        assert_between_lines(cut, line_tops)
+        assert abs(cut - target) < LINE_SPACING
+
+
+def test_cut_is_placed_in_the_middle_of_the_gap():
+    image, _ = page()
+    # Lines at 360-379 and 410-429 leave the gap 380-409 around the target 400
+    tiles = find_tiles(image, max_tiles=3, min_tile_height=100)
+    assert cuts(tiles)[0] == (380 + 409) // 2
+
+
+def test_light_text_on_dark_background():
+    image, line_tops = page(background="black", ink="white")
+    tiles = find_tiles(image, max_tiles=4, min_tile_height=100)
+    assert len(tiles) == 4
+    assert_covers_page(tiles, image)
+    for cut in cuts(tiles):
+        assert_between_lines(cut, line_tops)
+
+
+def test_cut_moves_away_from_the_target_into_a_gap():
+    # Text everywhere except a gap well away from the even split at 600, narrow enough to stay the minority
+    line_tops = [top for top in range(0, HEIGHT - LINE_HEIGHT, LINE_HEIGHT) if not 640 <= top < 700]
+    image, _ = page(line_tops=line_tops, line_width=WIDTH // 3)
+    tiles = find_tiles(image, max_tiles=2, min_tile_height=100)
+    assert 640 <= cuts(tiles)[0] < 700
+
+
+def test_blank_page_is_split_evenly():
+    image = Image.new("L", (WIDTH, HEIGHT), 255)
+    assert cuts(find_tiles(image, max_tiles=4, min_tile_height=100)) == [300, 600, 900]
+
+
+def test_min_tile_height_limits_the_number_of_tiles():
+    image, _ = page()
+    assert len(find_tiles(image, max_tiles=8, min_tile_height=500)) == 2
+    assert len(find_tiles(image, max_tiles=8, min_tile_height=2000)) == 1
+
+
+def test_merge_tile_texts_joins_non_empty_texts_in_order():
+    assert merge_tile_texts(["  Soup 4.50\n", "", "\n", "Bread 2.00  "]) == "Soup 4.50\nBread 2.00"
+    assert merge_tile_texts([]) == ""